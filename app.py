@@ -1,12 +1,36 @@
+import os
 import sys
+import collections
+import time
+import sqlite3
 import typing as t
-import importlib
 from dataclasses import dataclass
 import pandas as pd
 import streamlit as st
+from streamlit.errors import StreamlitAPIException
+
+from aggregate import LocationCountCache
+from archive import ParquetArchive
+from cache import ResultCache, frame_fingerprint, normalize_query
+from export import EXPORT_FORMATS, ExportCache, available_formats, export_buffer, filtered_chunks, frame_chunks
+from geo import RegionIndexCache
+from lazy import optional_import, preload
+from matching import apply_region_filter, apply_text_filter
+from query import build_query, keywords_fts_dropped, keywords_to_fts
+from render import CardCache, cards_html
+from poller import StorePoller
+from scraper import FETCH_MODES, FetchOptions, iter_batches, load_tweets, snowflake_time
+from sources import SOURCE_KINDS, ReplaySource, SnscrapeSource, SyntheticSource, TweetSource, read_tweet_file
+from store import COLUMNS, TweetStore
+from timing import StageTimer, TimingHistory, log_run
+
+if os.environ.get("TJD_EAGER_IMPORTS") == "1":
+    preload()
 
 # ---------- Page config & basic styles ----------
 st.set_page_config(page_title="Twitter Jobs Dashboard", page_icon="🔎", layout="wide")
+# Stage timings for this rerun, shown under ⏱️ Performance at the end of the script.
+perf = StageTimer()
 
 CUSTOM_CSS = '''
 <style>
@@ -36,11 +60,27 @@ st.markdown(CUSTOM_CSS, unsafe_allow_html=True)
 
 # ---------- Utils ----------
 def _get_snscrape():
-    """Try to import snscrape. If not installed, return None (we'll fall back to sample data)."""
+    """Try to import snscrape. If not installed, return None (we'll fall back to sample data).
+
+    Memoized for the whole process; installing snscrape needs an app restart.
+    """
+    return optional_import("snscrape.modules.twitter")
+
+def lazy_expander(label: str, key: str):
+    """Expander whose body can be skipped while collapsed (Streamlit versions that track expander state)."""
     try:
-        return importlib.import_module("snscrape.modules.twitter")
-    except Exception:
-        return None
+        return st.expander(label, key=key, on_change="rerun")
+    except TypeError:
+        return st.expander(label)
+
+
+def lazy_download_button(label: str, make_data: t.Callable[[], t.BinaryIO], **kwargs):
+    """Download button whose file is built only when clicked (Streamlit versions with deferred
+    downloads); older versions build it on every rerun."""
+    try:
+        return st.download_button(label, data=make_data, on_click="ignore", **kwargs)
+    except (TypeError, StreamlitAPIException):
+        return st.download_button(label, data=make_data(), **kwargs)
 
 def generate_sample_data(n: int = 40) -> pd.DataFrame:
     # Simple deterministic sample data
@@ -57,71 +97,177 @@ def generate_sample_data(n: int = 40) -> pd.DataFrame:
     rows = []
     for i in range(n):
         name, handle, text, loc = names[i % len(names)]
+        tweet_id = 1700000000000000000 + i
         rows.append({
             "display_name": name,
             "handle": f"@{handle}",
             "text": text + f" #{1000+i}",
-            "url": f"https://twitter.com/{handle}/status/{1700000000000000000 + i}",
-            "location": loc
+            "url": f"https://twitter.com/{handle}/status/{tweet_id}",
+            "location": loc,
+            "id": tweet_id,
+            "date": snowflake_time(tweet_id),
         })
     return pd.DataFrame(rows)
 
-def scrape_tweets(query: str, limit: int) -> pd.DataFrame:
-    sntwitter = _get_snscrape()
-    if sntwitter is None:
+def previous_result(
+    query: str,
+    limit: int,
+    cache: t.Optional[ResultCache] = None,
+    store: t.Optional[TweetStore] = None,
+) -> t.Optional[pd.DataFrame]:
+    """Tweets fetched for ``query`` earlier (cached, however old, or else stored), if any."""
+    entry = cache.latest(query) if cache is not None else None
+    if entry is not None and not entry.df.empty:
+        return entry.df.head(limit)
+    if store is not None:
+        stored = store.load(query, limit)
+        if not stored.empty:
+            return stored
+    return None
+
+def scrape_tweets(
+    query: str,
+    limit: int,
+    source: t.Optional[TweetSource] = None,
+    cache: t.Optional[ResultCache] = None,
+    incremental: bool = False,
+    store: t.Optional[TweetStore] = None,
+    options: t.Optional[FetchOptions] = None,
+    archive: t.Optional[ParquetArchive] = None,
+) -> pd.DataFrame:
+    if source is None:
         st.info("snscrape is not installed. Showing sample data. Install dependencies to enable live scraping.")
         return generate_sample_data(limit)
 
-    rows = []
+    def load() -> pd.DataFrame:
+        return load_tweets(source, query, limit, cache, incremental, store, options, archive)
+
     try:
-        for i, tweet in enumerate(sntwitter.TwitterSearchScraper(query).get_items()):
-            if i >= limit:
-                break
-            # Derive fields with fallbacks
-            handle = getattr(tweet.user, "username", None) or ""
-            display_name = getattr(tweet.user, "displayname", None) or handle
-            location = getattr(tweet.user, "location", None) or ""
-            text = getattr(tweet, "content", None) or getattr(tweet, "rawContent", "")
-            url = getattr(tweet, "url", None) or f"https://twitter.com/{handle}"
-            rows.append({
-                "display_name": display_name,
-                "handle": f"@{handle}" if handle else "",
-                "text": text,
-                "url": url,
-                "location": location or ""
-            })
+        # Sessions asking for the same query at the same time share one scrape.
+        df = cache.get_or_load(query, limit, load) if cache is not None else load()
     except Exception as e:
+        previous = previous_result(query, limit, cache, store)
+        if previous is not None:
+            st.warning(f"Live scraping failed ({type(e).__name__}). Showing {len(previous)} previously fetched tweets.")
+            return previous
         st.warning(f"Live scraping failed ({type(e).__name__}). Showing sample data instead.")
         return generate_sample_data(limit)
-
-    df = pd.DataFrame(rows)
     if df.empty:
+        previous = previous_result(query, limit, cache, store)
+        if previous is not None:
+            st.info(f"No live results returned. Showing {len(previous)} previously fetched tweets.")
+            return previous
         st.info("No live results returned. Showing sample data.")
         return generate_sample_data(limit)
     return df
 
-def apply_region_filter(df: pd.DataFrame, region_input: str) -> pd.DataFrame:
-    if not region_input.strip():
-        return df
-    regions = [r.strip().lower() for r in region_input.split(",") if r.strip()]
-    if not regions:
-        return df
-    def matches(loc: str) -> bool:
-        loc_l = (loc or "").lower()
-        return any(r in loc_l for r in regions)
-    return df[df["location"].apply(matches)]
-
-def tweet_card(display_name: str, handle: str, text: str, url: str, location: str):
-    # Convert line breaks for HTML
-    safe_text = (text or "").replace("&", "&amp;").replace("<", "&lt;").replace(">", "&gt;").replace("\n", "<br>")
-    html = f'''
-    <a class="tweet-card" href="{url}" target="_blank" rel="noopener">
-      <div class="tweet-hdr">{display_name} <span class="tweet-handle">{handle}</span></div>
-      <div class="tweet-body">{safe_text}</div>
-      <div class="tweet-meta">📍 {location if location else "Location not specified"} <span class="badge">Open on X</span></div>
-    </a>
-    '''
-    st.markdown(html, unsafe_allow_html=True)
+def stream_tweets(
+    query: str,
+    limit: int,
+    visible: t.Callable[[pd.DataFrame], pd.DataFrame],
+    source: t.Optional[TweetSource] = None,
+    cache: t.Optional[ResultCache] = None,
+    store: t.Optional[TweetStore] = None,
+    batch_size: int = 20,
+    archive: t.Optional[ParquetArchive] = None,
+) -> t.Tuple[pd.DataFrame, t.Optional[float]]:
+    """Like scrape_tweets, but shows cards, counts and a location chart while batches arrive.
+
+    ``visible`` applies the page filters to each batch. The preview is cleared once the
+    fetch completes and the regular page takes over. Also returns the time to first
+    tweet in seconds (None when nothing was streamed).
+    """
+    if source is None:
+        return scrape_tweets(query, limit), None
+    if cache is not None:
+        cached = cache.get(query, limit)
+        if cached is not None:
+            return cached, None
+
+    preview = st.empty()
+    started = time.perf_counter()
+    first_tweet = None
+    frames = []
+    shown = 0
+    loc_counts: t.Counter[str] = collections.Counter()
+    try:
+        with preview.container():
+            status = st.empty()
+            chart = st.empty()
+            feed = st.container()
+            for batch in iter_batches(source, query, limit, batch_size):
+                if first_tweet is None:
+                    first_tweet = time.perf_counter() - started
+                frames.append(pd.DataFrame(batch))
+                batch_visible = visible(frames[-1])
+                shown += len(batch_visible)
+                loc_counts.update(batch_visible["location"].replace("", "Unknown"))
+                status.caption(
+                    f"⏳ Streaming… {shown} of {sum(len(f) for f in frames)} tweets shown • "
+                    f"first tweet after {first_tweet * 1000:.0f} ms"
+                )
+                if loc_counts:
+                    chart.bar_chart(pd.Series(dict(loc_counts.most_common(15)), name="Count"), horizontal=True)
+                feed.markdown(cards_html(batch_visible, cache=get_card_cache()), unsafe_allow_html=True)
+    except Exception as e:
+        preview.empty()
+        previous = previous_result(query, limit, cache, store)
+        if previous is not None:
+            st.warning(f"Live scraping failed ({type(e).__name__}). Showing {len(previous)} previously fetched tweets.")
+            return previous, None
+        st.warning(f"Live scraping failed ({type(e).__name__}). Showing sample data instead.")
+        return generate_sample_data(limit), None
+    preview.empty()
+
+    df = pd.concat(frames, ignore_index=True) if frames else pd.DataFrame()
+    if df.empty:
+        previous = previous_result(query, limit, cache, store)
+        if previous is not None:
+            st.info(f"No live results returned. Showing {len(previous)} previously fetched tweets.")
+            return previous, None
+        st.info("No live results returned. Showing sample data.")
+        return generate_sample_data(limit), None
+    if store is not None:
+        store.upsert(df, query)
+    if archive is not None:
+        archive.append(df, query)
+    if cache is not None:
+        cache.put(query, limit, df)
+    return df, first_tweet
+
+PAGE_SIZES = [10, 25, 50, 100]
+
+# Rendered cards are identical for every session, so one cache serves the whole process.
+@st.cache_resource
+def get_card_cache() -> CardCache:
+    return CardCache(max_entries=int(os.environ.get("TJD_CARD_CACHE_SIZE", "5000")))
+
+def _feed_nav(start: int, count: int):
+    st.session_state["feed_start"] = max(0, start)
+    st.session_state["feed_count"] = count
+
+@st.fragment
+def render_feed(df: pd.DataFrame):
+    """Render one window of the feed. Paging only reruns this fragment, not the whole script."""
+    # A different result set starts again from the top.
+    signature = (len(df), df["url"].iloc[0], df["url"].iloc[-1])
+    page_size = st.selectbox("Tweets per page", PAGE_SIZES, index=1, key="feed_page_size")
+    if st.session_state.get("feed_signature") != signature or st.session_state.get("feed_size") != page_size:
+        st.session_state["feed_signature"] = signature
+        st.session_state["feed_size"] = page_size
+        _feed_nav(0, page_size)
+    start = min(st.session_state["feed_start"], max(0, len(df) - 1))
+    count = st.session_state["feed_count"]
+    end = min(start + count, len(df))
+
+    # One markdown element for the whole window instead of one per card.
+    st.markdown(cards_html(df.iloc[start:end], cache=get_card_cache()), unsafe_allow_html=True)
+
+    prev_col, info_col, more_col, next_col = st.columns([1, 2, 1, 1])
+    prev_col.button("← Previous", disabled=start == 0, on_click=_feed_nav, args=(start - page_size, page_size), key="feed_prev")
+    info_col.caption(f"Tweets {start + 1}–{end} of {len(df)}")
+    more_col.button("Load more", disabled=end >= len(df), on_click=_feed_nav, args=(start, count + page_size), key="feed_more")
+    next_col.button("Next →", disabled=end >= len(df), on_click=_feed_nav, args=(end, page_size), key="feed_next")
 
 # ---------- Sidebar controls ----------
 with st.sidebar:
@@ -130,65 +276,341 @@ with st.sidebar:
     keywords = st.text_input("Keywords (Twitter search syntax)", value=default_keywords, help="Use quotes and OR for better results. We also add language & exclude retweets/replies.")
     max_tweets = st.slider("Max tweets to fetch", min_value=10, max_value=500, value=120, step=10)
     region = st.text_input("Region/Location filter (comma-separated)", value="", placeholder="India, Remote, Bengaluru, USA")
-    live = st.toggle("Use live scraping (snscrape)", value=True)
+    text_terms = st.text_input("Tweet text must mention (comma-separated)", value="", placeholder="figma, contract, remote", help="Filters the fetched tweets locally, without a new search.")
+    live = st.toggle("Use live scraping (snscrape)", value=True, help="Off shows the built-in sample data. Pick a replay file or synthetic tweets instead of snscrape under 🔌 Source.")
+    search_archive = st.toggle("Search local archive", value=False, help="Match the keywords against tweets already in the local store instead of scraping.")
     st.caption("Tip: If live scraping fails or is off, the app will use high‑quality sample data so you can test everything.")
+    with st.expander("⚙️ Cache"):
+        incremental = st.toggle("Incremental refresh", value=True, help="When a cached result expires, only fetch tweets newer than the ones already fetched.")
+        clear_cache = st.button("Clear cache (all sessions)", help="The result cache is shared by every session of this app, so this clears it for everyone.")
+        cache_stats = st.empty()
+    with st.expander("⚡ Fetch mode"):
+        fetch_mode = st.radio("Strategy", FETCH_MODES, format_func={"serial": "Serial", "date shards": "Date shards", "or split": "OR split"}.get, help="Date shards split the search into one since:/until: window per day. OR split runs each top-level OR term as its own search, and each term's result is cached separately. Both fetch in parallel.")
+        fetch_workers = st.slider("Parallel workers", min_value=1, max_value=16, value=4)
+        shard_days = st.slider("Look back (days)", min_value=1, max_value=30, value=7, help="Date shards only search this many days back.")
+        stream_feed = st.toggle("Stream results as they arrive", value=False, help="Show cards in batches of 20 while fetching. Streaming uses a serial fetch, so the strategy above is ignored.")
+    with st.expander("🔌 Source"):
+        source_kind = st.radio("Tweet source", SOURCE_KINDS, format_func={"snscrape": "Live (snscrape)", "replay": "Replay file", "synthetic": "Synthetic"}.get, help="Replay and synthetic sources run the whole pipeline offline. Their results skip the local store.")
+        replay_path = st.text_input("Replay file (.jsonl or .parquet)", value="", disabled=source_kind != "replay")
+        synthetic_volume = st.number_input("Synthetic tweets per query", min_value=10, max_value=10_000_000, value=10_000, step=1_000, disabled=source_kind != "synthetic")
+        synthetic_seed = st.number_input("Synthetic seed", min_value=0, value=0, step=1, disabled=source_kind != "synthetic")
+        source_latency_ms = st.number_input("Latency per page of 20 tweets (ms)", min_value=0, max_value=10_000, value=0, step=50, disabled=source_kind == "snscrape")
+    with st.expander("🗄️ Local store"):
+        use_store = st.toggle("Save tweets to local SQLite store", value=True, help="Stored tweets are served at startup; only newer tweets are scraped.")
+        store_stats = st.empty()
+        use_archive = st.toggle("Append fetches to Parquet archive", value=False, help="Date-partitioned Parquet files for historical analysis (needs pyarrow). Query them with `python archive.py query`.")
+        compact_archive = st.button("Compact archive", disabled=not use_archive, help="Merge each day's per-fetch files into one.")
+        archive_stats = st.empty()
+    with st.expander("🐞 Debug"):
+        debug_stats = st.empty()
+    with st.expander("⏱️ Performance"):
+        perf_panel = st.empty()
+
+# ---------- Tweet source ----------
+# Parsed once per file version and shared by every session; only recent versions are kept.
+@st.cache_resource(max_entries=4)
+def load_replay_file(path: str, mtime: float) -> pd.DataFrame:
+    return read_tweet_file(path)
+
+source: t.Optional[TweetSource] = None
+if source_kind == "snscrape":
+    sntwitter = _get_snscrape()
+    source = SnscrapeSource(sntwitter) if sntwitter is not None else None
+elif source_kind == "replay":
+    try:
+        frame = load_replay_file(replay_path, os.path.getmtime(replay_path))
+        source = ReplaySource(replay_path, latency=source_latency_ms / 1000, frame=frame)
+    except (OSError, ValueError) as e:
+        if live:
+            st.warning(f"Could not read the replay file ({type(e).__name__}). Showing sample data instead.")
+        live = False
+else:
+    source = SyntheticSource(volume=int(synthetic_volume), latency=source_latency_ms / 1000, seed=int(synthetic_seed))
+# Results of non-persistent sources (replay, synthetic) skip the local store and archive.
+offline = source is not None and not source.persistent
+
+# Result cache shared by every session of this process, so concurrent identical queries scrape once.
+# One per source, so switching sources never serves another source's tweets; caches of
+# the least recently used source settings are dropped.
+# Sized by TJD_CACHE_TTL (seconds) and TJD_CACHE_MB rather than widgets, since every session shares it.
+@st.cache_resource(max_entries=8)
+def get_result_cache(source_key: str) -> ResultCache:
+    return ResultCache(
+        ttl=float(os.environ.get("TJD_CACHE_TTL", "300")),
+        max_bytes=int(float(os.environ.get("TJD_CACHE_MB", "64")) * 1024 * 1024),
+    )
+
+result_cache = get_result_cache(source.key if source is not None else "snscrape")
+if clear_cache:
+    result_cache.clear()
+
+# Process-wide SQLite store shared by all sessions
+@st.cache_resource
+def get_tweet_store(path: str) -> TweetStore:
+    return TweetStore(path)
+
+store_path = os.environ.get("TJD_STORE_PATH", "tweets.db")
+tweet_store = get_tweet_store(store_path) if use_store else None
+
+# Process-wide Parquet archive (optional; needs pyarrow)
+@st.cache_resource
+def get_archive(path: str) -> ParquetArchive:
+    return ParquetArchive(path)
+
+archive_path = os.environ.get("TJD_ARCHIVE_PATH", "archive")
+parquet_archive = None
+if use_archive:
+    try:
+        parquet_archive = get_archive(archive_path)
+    except RuntimeError as e:
+        archive_stats.caption(str(e))
+if parquet_archive is not None and compact_archive:
+    archive_stats.caption(f"Compacted: {parquet_archive.compact()}")
 
 # Build query
-query = f'{keywords} lang:en exclude:retweets exclude:replies'
+with perf.stage("query"):
+    query = build_query(keywords)
 st.caption(f"Search query: `{query}`")
+fetch_options = FetchOptions(mode=fetch_mode, workers=fetch_workers, shard_days=shard_days)
+
+# ---------- Background refresh ----------
+# One poller per process keeps saved queries warm in the store. Set TJD_BACKGROUND_POLLER=0
+# when running `python poller.py` as a separate process instead. Its settings apply to every
+# session, so they come from TJD_POLL_INTERVAL, TJD_POLL_JITTER, TJD_POLL_CONCURRENCY and
+# TJD_POLL_TIMEOUT rather than from widgets.
+@st.cache_resource
+def get_poller(path: str) -> StorePoller:
+    poller = StorePoller(
+        get_tweet_store(path),
+        interval=float(os.environ.get("TJD_POLL_INTERVAL", "300")),
+        jitter=float(os.environ.get("TJD_POLL_JITTER", "0.1")),
+        concurrency=int(os.environ.get("TJD_POLL_CONCURRENCY", "4")),
+        timeout=float(os.environ.get("TJD_POLL_TIMEOUT", "120")),
+    )
+    if os.environ.get("TJD_BACKGROUND_POLLER", "1") == "1":
+        poller.start()
+    return poller
+
+def toggle_warm(store: TweetStore, poller: StorePoller, query: str, limit: int):
+    # Saved queries are shared, so they only change when this session flips the toggle;
+    # a stale toggle in another session never unsaves them.
+    if st.session_state["keep_warm"]:
+        store.save_query(query, limit)
+        poller.wake()
+    else:
+        store.unsave_query(query)
+
+warm = False
+if tweet_store is not None:
+    poller = get_poller(store_path)
+    saved = tweet_store.saved_queries()
+    st.session_state["keep_warm"] = normalize_query(query) in saved
+    with st.sidebar, st.expander("🔄 Background refresh"):
+        warm = st.toggle(
+            "Keep this query warm (all sessions)", key="keep_warm",
+            on_change=toggle_warm, args=(tweet_store, poller, query, max_tweets),
+            help="Refresh this query in the background and serve it straight from the local store, for every session.",
+        )
+        st.caption(
+            f"Every {poller.interval:.0f} s (± {poller.jitter:.0%}), {poller.concurrency} in parallel, "
+            f"{poller.timeout:.0f} s timeout per query. Set with `TJD_POLL_*` environment variables."
+        )
+        refresh_now = st.button("Refresh saved queries now", help="Runs here with a progress bar; changing any input cancels it.")
+        refresh_progress = st.empty()
+        poller_status = st.empty()
+    if refresh_now:
+        # Each progress update is a Streamlit call, so a rerun triggered by an input change
+        # surfaces here and the engine cancels the refreshes still in flight.
+        bar = refresh_progress.progress(0.0, text="Refreshing saved queries…")
+        added = poller.refresh_all(on_progress=lambda done, total: bar.progress(done / total, text=f"Refreshed {done} of {total} queries…"))
+        refresh_progress.caption(f"Refresh finished: {added} new tweets stored.")
 
 # ---------- Fetch data ----------
-if live:
-    df = scrape_tweets(query, max_tweets)
-else:
-    df = generate_sample_data(max_tweets)
+def visible_rows(frame: pd.DataFrame, index=None) -> pd.DataFrame:
+    return apply_text_filter(apply_region_filter(frame, region, index), text_terms)
+
+# Canonical-region index of the current result, shared across sessions and kept while its rows are unchanged
+@st.cache_resource
+def get_region_indexes() -> RegionIndexCache:
+    return RegionIndexCache()
+
+region_indexes = get_region_indexes()
+
+time_to_first_tweet = None
+archive_ready = tweet_store is not None and tweet_store.has_fts
+if search_archive and not archive_ready:
+    st.info("Local archive search needs the local store and SQLite with FTS5. Falling back to scraping.")
+with perf.stage("fetch"):
+    # Where the rows came from; derived caches key on it together with the source settings.
+    data_origin = "live"
+    if search_archive and archive_ready:
+        data_origin = "archive search"
+        started = time.perf_counter()
+        # Full-text search has no search operators and no standalone negation; say what was left out.
+        dropped = keywords_fts_dropped(keywords)
+        if dropped:
+            parts = ", ".join(f"`{d}`" for d in dropped)
+            if keywords_to_fts(keywords) is None:
+                st.warning(f"Local archive search needs at least one word or phrase to match; {parts} cannot be searched on its own.")
+            else:
+                st.warning(f"Local archive search cannot express {parts}, so it searched without it. Results may differ from a live search.")
+        try:
+            df = tweet_store.search(keywords, max_tweets)
+        except sqlite3.OperationalError as e:
+            st.warning(f"Could not search the local archive ({e}).")
+            df = pd.DataFrame(columns=COLUMNS)
+        st.caption(f"Searched local archive in {(time.perf_counter() - started) * 1000:.1f} ms")
+    elif live and warm and not offline and tweet_store.fetched_at(query) is not None:
+        # Precomputed by the background poller; no scraping on page load.
+        data_origin = "warm store"
+        df = tweet_store.load(query, max_tweets)
+        st.caption("Served from the local store (kept warm in the background).")
+    elif live and stream_feed:
+        df, time_to_first_tweet = stream_tweets(
+            query, max_tweets, visible_rows, source, cache=result_cache, store=None if offline else tweet_store,
+            archive=None if offline else parquet_archive,
+        )
+    elif live:
+        df = scrape_tweets(
+            query, max_tweets, source, cache=result_cache, incremental=incremental,
+            store=None if offline else tweet_store, options=fetch_options,
+            archive=None if offline else parquet_archive,
+        )
+    else:
+        data_origin = "sample"
+        df = generate_sample_data(max_tweets)
+data_key = (source.key if source is not None else source_kind, data_origin, normalize_query(query))
+cache_stats.caption(
+    f"Hits: **{result_cache.hits}** • Misses: **{result_cache.misses}** "
+    f"({result_cache.hit_ratio:.0%} hit ratio) • Coalesced: **{result_cache.coalesced}** • {len(result_cache)} entries, "
+    f"{result_cache.nbytes / 1024 / 1024:.1f} MB"
+)
+if parquet_archive is not None and not compact_archive:
+    parts = parquet_archive.partitions()
+    archive_stats.caption(
+        f"`{archive_path}/` • **{int(parts['rows'].sum()) if len(parts) else 0:,}** rows in "
+        f"{int(parts['files'].sum()) if len(parts) else 0} files over {len(parts)} days"
+    )
+if tweet_store is not None:
+    store_stats.caption(f"`{store_path}` • **{tweet_store.count():,}** tweets stored, **{tweet_store.count(query):,}** for this query")
 
 # ---------- Apply filters ----------
-df_filtered = apply_region_filter(df, region)
+with perf.stage("filter"):
+    # Building the index costs about one substring scan; later region edits are set lookups.
+    region_index = region_indexes.get(data_key, df) if region.strip() else None
+    df_filtered = visible_rows(df, region_index)
 
 # ---------- Summary & export ----------
 left, right = st.columns([1,1])
 with left:
     st.subheader("Results")
     st.write(f"Showing **{len(df_filtered)}** of **{len(df)}** tweets.")
+    if time_to_first_tweet is not None:
+        st.caption(f"⏱️ Time to first tweet: {time_to_first_tweet * 1000:.0f} ms (streamed)")
+# Finished exports shared by every session, keyed by format and filter state
+@st.cache_resource
+def get_export_cache() -> ExportCache:
+    return ExportCache()
+
+export_cache = get_export_cache()
+
 with right:
-    csv = df_filtered.to_csv(index=False)
-    st.download_button("⬇️ Export filtered to CSV", data=csv, file_name="twitter_jobs_filtered.csv", mime="text/csv")
+    with perf.stage("export"):
+        export_format = st.selectbox(
+            "Export format", available_formats(), format_func=lambda f: EXPORT_FORMATS[f].label,
+            help="Parquet, Arrow and zstd need pyarrow.",
+        )
+        fmt = EXPORT_FORMATS[export_format]
+        filter_state = data_key + (region, text_terms)
+        filtered_key = ("filtered", export_format) + filter_state + frame_fingerprint(df_filtered)
+        # Serialized in chunks, only when the button is clicked, and reused until the rows change.
+        lazy_download_button(
+            f"⬇️ Export filtered to {fmt.label}",
+            lambda: export_cache.get(filtered_key, lambda: export_buffer(frame_chunks(df_filtered), export_format)),
+            file_name=f"twitter_jobs_filtered.{fmt.extension}", mime=fmt.mime,
+        )
+        if tweet_store is not None and not offline:
+            lazy_download_button(
+                "⬇️ Export all stored tweets for this query",
+                lambda: export_cache.get(
+                    ("stored", export_format) + filter_state + (tweet_store.count(query), tweet_store.max_id(query)),
+                    lambda: export_buffer(filtered_chunks(tweet_store.iter_chunks(query), region, text_terms), export_format),
+                ),
+                file_name=f"twitter_jobs_stored.{fmt.extension}", mime=fmt.mime,
+                help="Every stored tweet for this query with the current filters, streamed from the local store.",
+            )
 
 # ---------- Optional charts ----------
-with st.expander("📊 Optional charts"):
-    if df_filtered.empty:
-        st.info("No data to chart yet.")
-    else:
-        # Jobs per location (top 15)
-        loc_counts = (
-            df_filtered.assign(location=df_filtered["location"].fillna("").replace("", "Unknown"))
-            .groupby("location", as_index=False)
-            .size()
-            .sort_values("size", ascending=False)
-            .head(15)
-        )
+# Location counts per filter state, shared across sessions and only extended when tweets are added
+@st.cache_resource
+def get_location_counts() -> LocationCountCache:
+    return LocationCountCache()
 
-        try:
-            import altair as alt
-            chart = alt.Chart(loc_counts).mark_bar().encode(
-                x=alt.X('size:Q', title='Count'),
-                y=alt.Y('location:N', sort='-x', title='Location'),
-                tooltip=['location', 'size']
-            ).properties(height=400)
-            st.altair_chart(chart, use_container_width=True)
-        except Exception:
-            st.info("Altair is not installed; skipping charts.")
+location_cache = get_location_counts()
+charts = lazy_expander("📊 Optional charts", key="charts_expander")
+# `open` is None when the expander state is not tracked; then the body always runs.
+if getattr(charts, "open", None) is not False:
+    with charts, perf.stage("charts"):
+        if df_filtered.empty:
+            st.info("No data to chart yet.")
+        else:
+            # Jobs per location (top 15)
+            loc_counts = location_cache.top(filter_state, df_filtered, n=15)
+
+            alt = optional_import("altair")
+            if alt is None:
+                st.info("Altair is not installed; skipping charts.")
+            else:
+                chart = alt.Chart(loc_counts).mark_bar().encode(
+                    x=alt.X('size:Q', title='Count'),
+                    y=alt.Y('location:N', sort='-x', title='Location'),
+                    tooltip=['location', 'size']
+                ).properties(height=400)
+                st.altair_chart(chart, use_container_width=True)
 
 # ---------- Feed ----------
 if df_filtered.empty:
     st.warning("No tweets found with the current filters. Try changing keywords or removing the region filter.")
 else:
-    for _, row in df_filtered.iterrows():
-        tweet_card(row["display_name"], row["handle"], row["text"], row["url"], row["location"])
+    with perf.stage("feed"):
+        render_feed(df_filtered)
+
+if tweet_store is not None:
+    now = time.time()
+    poll_rows = [{
+        "Query": s.query,
+        "Last refresh": time.strftime("%H:%M:%S", time.localtime(s.last_refresh)) if s.last_refresh else "pending",
+        "Lag (s)": round(s.lag(now)) if s.last_refresh else None,
+        "New": s.last_new,
+        "Error": s.last_error,
+    } for s in poller.status()]
+    if poll_rows:
+        poller_status.dataframe(pd.DataFrame(poll_rows), hide_index=True)
+    else:
+        poller_status.caption("No saved queries." if poller.running else "Background poller is disabled (TJD_BACKGROUND_POLLER=0).")
+
+card_cache = get_card_cache()
+debug_stats.caption(
+    f"Card HTML cache: **{len(card_cache):,}** / {card_cache.max_entries:,} cards • "
+    f"{card_cache.hit_ratio:.0%} hit ratio ({card_cache.hits:,} hits, {card_cache.misses:,} misses) • "
+    f"Exports cached: **{len(export_cache)}** ({export_cache.nbytes / 1024 / 1024:.1f} MB, "
+    f"{export_cache.hits:,} hits, {export_cache.misses:,} misses) • "
+    f"Location counts: {location_cache.stats['cached']:,} reused, "
+    f"{location_cache.stats['incremental']:,} incremental, {location_cache.stats['full']:,} full"
+)
 
 # ---------- Footer ----------
 st.markdown(
     '<div class="footer-note">Built with Streamlit • Uses snscrape for live search (no paid APIs) • Educational/portfolio use only.</div>',
     unsafe_allow_html=True
 )
+
+# ---------- Performance ----------
+run_timing = perf.finish()
+perf_history = st.session_state.setdefault("perf_history", TimingHistory(maxlen=50))
+perf_history.add(run_timing)
+log_run(run_timing, query=query, source=source_kind, rows=len(df), shown=len(df_filtered))
+with perf_panel.container():
+    st.caption(f"Last rerun: **{run_timing.total * 1000:.0f} ms** • {len(perf_history)} reruns in history")
+    st.dataframe(perf_history.summary().round(1), hide_index=True)
+    st.bar_chart(perf_history.frame(), height=200, x_label="Rerun", y_label="ms")
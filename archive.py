@@ -0,0 +1,282 @@
+"""Date-partitioned Parquet archive of collected tweets, for historical analysis.
+
+Layout (Hive partitioning, one directory per tweet day)::
+
+    <root>/day=2024-05-01/part-<fetch time>-<id>.parquet
+
+Every ``append`` (one fetch) writes one file per day it touches, as a single row
+group. Reads go through ``pyarrow.dataset``: the day range prunes whole partitions,
+the remaining filters (exact date range, query, location substrings) are evaluated
+by Arrow while scanning, and only the requested columns are read, so the archive is
+never materialized as a DataFrame. ``compact`` merges each day's small per-fetch
+files into one, dropping duplicate rows.
+
+pyarrow is an optional dependency; without it ``ParquetArchive`` raises RuntimeError.
+
+    python archive.py stats --root archive
+    python archive.py query --root archive --since 2024-05-01 --region "india, remote" --columns handle location
+    python archive.py compact --root archive
+"""
+import argparse
+import datetime as dt
+import os
+import threading
+import time
+import typing as t
+import uuid
+
+import pandas as pd
+
+from cache import normalize_query
+from lazy import optional_import
+from matching import split_terms
+from store import COLUMNS, normalize_location
+
+PARTITION = "day"
+# Compacted files are written in row groups of this many rows, so row-group statistics
+# on id/date still let readers skip most of a large day.
+COMPACT_ROW_GROUP = 128 * 1024
+
+
+def _arrow():
+    modules = [optional_import(name) for name in ("pyarrow", "pyarrow.compute", "pyarrow.dataset", "pyarrow.parquet")]
+    if any(m is None for m in modules):
+        raise RuntimeError("The Parquet archive needs pyarrow (pip install pyarrow).")
+    return modules
+
+
+def _schema(pa):
+    return pa.schema([
+        ("display_name", pa.string()),
+        ("handle", pa.string()),
+        ("text", pa.string()),
+        ("url", pa.string()),
+        ("location", pa.string()),
+        ("location_norm", pa.string()),
+        ("id", pa.int64()),
+        ("date", pa.timestamp("us", tz="UTC")),
+        ("query", pa.string()),
+        ("fetched_at", pa.timestamp("us", tz="UTC")),
+    ])
+
+
+def _day(value: t.Union[str, dt.date, pd.Timestamp]) -> pd.Timestamp:
+    ts = pd.Timestamp(value)
+    return ts.tz_localize("UTC") if ts.tz is None else ts.tz_convert("UTC")
+
+
+class ParquetArchive:
+    def __init__(self, root: str = "archive"):
+        self.root = root
+        self._pa, self._pc, self._ds, self._pq = _arrow()
+        self.schema = _schema(self._pa)
+        self._compact_lock = threading.Lock()
+        os.makedirs(root, exist_ok=True)
+
+    # ---------- Writes ----------
+    def append(self, df: pd.DataFrame, query: t.Optional[str] = None) -> int:
+        """Write one fetch as a new file (one row group) in each day partition it touches."""
+        if df.empty:
+            return 0
+        frame = df.reindex(columns=COLUMNS).copy()
+        frame["date"] = pd.to_datetime(frame["date"], utc=True)
+        frame["location"] = frame["location"].fillna("")
+        frame["location_norm"] = frame["location"].map(normalize_location)
+        frame["query"] = normalize_query(query) if query is not None else None
+        frame["fetched_at"] = pd.Timestamp.now(tz="UTC")
+        stamp = time.strftime("%Y%m%dT%H%M%S")
+        for day, part in frame.groupby(frame["date"].dt.strftime("%Y-%m-%d"), sort=False):
+            table = self._pa.Table.from_pandas(part, schema=self.schema, preserve_index=False)
+            self._write(table, day, f"part-{stamp}-{uuid.uuid4().hex[:8]}.parquet", len(table))
+        return len(frame)
+
+    def _write(self, table, day: str, name: str, row_group_size: int) -> str:
+        directory = os.path.join(self.root, f"{PARTITION}={day}")
+        os.makedirs(directory, exist_ok=True)
+        path = os.path.join(directory, name)
+        # Readers skip dot-files, so a half-written file is never picked up.
+        tmp = os.path.join(directory, f".{name}.tmp")
+        self._pq.write_table(table, tmp, row_group_size=max(1, row_group_size), compression="zstd")
+        os.replace(tmp, path)
+        return path
+
+    # ---------- Reads ----------
+    def _dataset(self):
+        return self._ds.dataset(
+            self.root, format="parquet", schema=self.schema.append(self._pa.field(PARTITION, self._pa.string())),
+            partitioning="hive",
+        )
+
+    def _filter(
+        self,
+        since=None,
+        until=None,
+        query: t.Optional[str] = None,
+        region: str = "",
+    ):
+        ds, pc = self._ds, self._pc
+        conditions = []
+        if since is not None:
+            since = _day(since)
+            conditions.append(ds.field(PARTITION) >= since.strftime("%Y-%m-%d"))
+            conditions.append(ds.field("date") >= self._pa.scalar(since, self.schema.field("date").type))
+        if until is not None:
+            until = _day(until)
+            conditions.append(ds.field(PARTITION) <= until.strftime("%Y-%m-%d"))
+            conditions.append(ds.field("date") < self._pa.scalar(until, self.schema.field("date").type))
+        if query is not None:
+            conditions.append(ds.field("query") == normalize_query(query))
+        regions = split_terms(region)
+        if regions:
+            # Case-insensitive substring of any region; unlike apply_region_filter, aliases are
+            # not resolved through the gazetteer, which Arrow cannot evaluate.
+            matches = [pc.match_substring(ds.field("location_norm"), normalize_location(r)) for r in regions]
+            conditions.append(_any(matches))
+        return _all(conditions)
+
+    def scanner(
+        self,
+        columns: t.Optional[t.Sequence[str]] = None,
+        since=None,
+        until=None,
+        query: t.Optional[str] = None,
+        region: str = "",
+        batch_size: int = 64 * 1024,
+    ):
+        """A ``pyarrow.dataset.Scanner`` reading only the matching partitions, rows and ``columns``.
+
+        ``since`` is inclusive and ``until`` exclusive (dates or timestamps, UTC);
+        ``region`` is comma-separated like the dashboard's location filter.
+        """
+        return self._dataset().scanner(
+            columns=list(columns) if columns is not None else COLUMNS,
+            filter=self._filter(since, until, query, region),
+            batch_size=batch_size,
+        )
+
+    def read(self, columns: t.Optional[t.Sequence[str]] = None, limit: t.Optional[int] = None, **filters) -> pd.DataFrame:
+        """Matching tweets as a DataFrame, newest first, one row per tweet ID."""
+        columns = list(columns) if columns is not None else list(COLUMNS)
+        wanted = columns + [c for c in ("id",) if c not in columns]
+        df = self.scanner(wanted, **filters).to_table().to_pandas()
+        # Uncompacted days can hold the same tweet from several fetches.
+        df = df.drop_duplicates("id").sort_values("id", ascending=False, kind="stable")
+        if limit is not None:
+            df = df.head(limit)
+        return df[columns].reset_index(drop=True)
+
+    def iter_batches(self, columns: t.Optional[t.Sequence[str]] = None, **filters) -> t.Iterator[pd.DataFrame]:
+        """Matching rows in Arrow-sized batches (not deduplicated), for aggregations over large ranges."""
+        for batch in self.scanner(columns, **filters).to_batches():
+            if batch.num_rows:
+                yield batch.to_pandas()
+
+    def count(self, **filters) -> int:
+        """Matching rows, counted from Parquet metadata where possible (not deduplicated)."""
+        return self.scanner(["id"], **filters).count_rows()
+
+    def partitions(self) -> pd.DataFrame:
+        """Files, rows and bytes per day partition."""
+        rows = []
+        for entry in sorted(os.scandir(self.root), key=lambda e: e.name):
+            if not entry.is_dir() or not entry.name.startswith(f"{PARTITION}="):
+                continue
+            files = self._files(entry.path)
+            rows.append({
+                PARTITION: entry.name.split("=", 1)[1],
+                "files": len(files),
+                "rows": sum(self._pq.ParquetFile(f).metadata.num_rows for f in files),
+                "bytes": sum(os.path.getsize(f) for f in files),
+            })
+        return pd.DataFrame(rows, columns=[PARTITION, "files", "rows", "bytes"])
+
+    @staticmethod
+    def _files(directory: str) -> t.List[str]:
+        return sorted(
+            e.path for e in os.scandir(directory)
+            if e.is_file() and e.name.endswith(".parquet") and not e.name.startswith((".", "_"))
+        )
+
+    # ---------- Maintenance ----------
+    def compact(self, min_files: int = 2) -> t.Dict[str, int]:
+        """Merge every day with at least ``min_files`` files into one file, dropping duplicate rows.
+
+        A tweet collected for several queries keeps one row per query (its most recent
+        fetch). Compactions through the same instance run one at a time, so a second
+        request finds the days already merged. Files appended while a day is being
+        compacted are left alone, and files removed by another process compacting the
+        same archive are skipped. A reader running at the same time may briefly see a
+        tweet twice; ``read`` deduplicates.
+        """
+        with self._compact_lock:
+            merged_days = removed = written_rows = 0
+            for entry in os.scandir(self.root):
+                if not entry.is_dir() or not entry.name.startswith(f"{PARTITION}="):
+                    continue
+                files = self._files(entry.path)
+                if len(files) < min_files:
+                    continue
+                try:
+                    table = self._pa.concat_tables([self._pq.read_table(f, schema=self.schema) for f in files])
+                except FileNotFoundError:
+                    continue
+                # Keep each tweet's most recent fetch per query.
+                df = table.to_pandas().sort_values(["id", "fetched_at"], ascending=False, kind="stable")
+                df = df.drop_duplicates(["id", "query"]).reset_index(drop=True)
+                merged = self._pa.Table.from_pandas(df, schema=self.schema, preserve_index=False)
+                day = entry.name.split("=", 1)[1]
+                self._write(merged, day, f"compacted-{time.strftime('%Y%m%dT%H%M%S')}-{uuid.uuid4().hex[:8]}.parquet", COMPACT_ROW_GROUP)
+                for f in files:
+                    try:
+                        os.remove(f)
+                    except FileNotFoundError:
+                        pass
+                merged_days += 1
+                removed += len(files)
+                written_rows += len(df)
+            return {"days": merged_days, "files_merged": removed, "rows": written_rows}
+
+
+def _all(conditions):
+    out = None
+    for c in conditions:
+        out = c if out is None else out & c
+    return out
+
+
+def _any(conditions):
+    out = None
+    for c in conditions:
+        out = c if out is None else out | c
+    return out
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Inspect, query or compact the Parquet tweet archive.")
+    parser.add_argument("command", choices=["stats", "query", "compact"])
+    parser.add_argument("--root", default=os.environ.get("TJD_ARCHIVE_PATH", "archive"))
+    parser.add_argument("--since", help="first day (inclusive), e.g. 2024-05-01")
+    parser.add_argument("--until", help="end day (exclusive)")
+    parser.add_argument("--query", help="only tweets collected for this search query")
+    parser.add_argument("--region", default="", help="comma-separated location substrings")
+    parser.add_argument("--columns", nargs="+", default=["date", "handle", "location", "text"])
+    parser.add_argument("--limit", type=int, default=20)
+    parser.add_argument("--min-files", type=int, default=2, help="compact days with at least this many files")
+    args = parser.parse_args()
+
+    archive = ParquetArchive(args.root)
+    if args.command == "stats":
+        parts = archive.partitions()
+        print(parts.to_string(index=False) if not parts.empty else "Archive is empty.")
+        print(f"{int(parts['rows'].sum()) if not parts.empty else 0:,} rows in {int(parts['files'].sum()) if not parts.empty else 0} files")
+    elif args.command == "query":
+        started = time.perf_counter()
+        df = archive.read(args.columns, limit=args.limit, since=args.since, until=args.until, query=args.query, region=args.region)
+        print(df.to_string(index=False))
+        print(f"{len(df)} rows in {(time.perf_counter() - started) * 1000:.0f} ms")
+    else:
+        print(archive.compact(args.min_files))
+
+
+if __name__ == "__main__":
+    main()
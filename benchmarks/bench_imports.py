@@ -0,0 +1,67 @@
+"""Startup import cost of the dashboard, lazy (default) vs eager (``TJD_EAGER_IMPORTS=1``).
+
+Runs ``python -X importtime`` over the top-level imports of ``app.py`` (read from its
+source, so the report follows the app) in a fresh interpreter, with and without the
+eager preload of heavy optional modules, and prints totals plus the heaviest packages.
+
+    python benchmarks/bench_imports.py --repeat 5 --top 10
+"""
+import argparse
+import ast
+import collections
+import os
+import subprocess
+import sys
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def app_imports() -> str:
+    with open(os.path.join(ROOT, "app.py"), encoding="utf-8") as f:
+        tree = ast.parse(f.read())
+    nodes = [n for n in tree.body if isinstance(n, (ast.Import, ast.ImportFrom))]
+    return "\n".join(ast.unparse(n) for n in nodes)
+
+
+def measure(code: str) -> collections.Counter:
+    """Self import time (us) per top-level package for one cold interpreter."""
+    proc = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", code],
+        cwd=ROOT, capture_output=True, text=True, check=True,
+    )
+    per_package: collections.Counter = collections.Counter()
+    for line in proc.stderr.splitlines():
+        if not line.startswith("import time:") or "self [us]" in line:
+            continue
+        self_us, _, name = line.split(":", 1)[1].split("|")
+        per_package[name.strip().split(".")[0]] += int(self_us)
+    return per_package
+
+
+def best_of(code: str, repeat: int) -> collections.Counter:
+    runs = [measure(code) for _ in range(repeat)]
+    return min(runs, key=lambda c: sum(c.values()))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--top", type=int, default=10)
+    args = parser.parse_args()
+
+    lazy_code = app_imports()
+    eager_code = lazy_code + "\nfrom lazy import preload\npreload()"
+    results = {"eager": best_of(eager_code, args.repeat), "lazy": best_of(lazy_code, args.repeat)}
+
+    for mode, per_package in results.items():
+        print(f"{mode:>5}: {sum(per_package.values()) / 1000:8.1f} ms total import time")
+    saved = sum(results["eager"].values()) - sum(results["lazy"].values())
+    print(f"saved: {saved / 1000:8.1f} ms at startup\n")
+
+    print(f"{'package':<24} {'eager ms':>9} {'lazy ms':>9}")
+    for name, us in results["eager"].most_common(args.top):
+        print(f"{name:<24} {us / 1000:>9.1f} {results['lazy'].get(name, 0) / 1000:>9.1f}")
+
+
+if __name__ == "__main__":
+    main()
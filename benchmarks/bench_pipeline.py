@@ -0,0 +1,206 @@
+"""Pipeline benchmark: fetch, filter, render, export and chart stages at several sizes.
+
+Every stage runs on synthetic tweets (``sources.synthetic_frame``); the fetch stage
+pulls them through the scraper from ``SyntheticSource``, a fake scraper with no
+latency. Each stage (see ``MAX_ROWS`` for the ones capped in size) records its best wall time over ``--repeat`` runs and its peak
+Python-heap allocation (``tracemalloc``, measured in a separate run; memory held by
+Arrow-backed strings is not visible to it). Results are written as JSON so two
+commits can be compared:
+
+    python benchmarks/bench_pipeline.py --sizes 1000 100000 1000000 --out before.json
+    git checkout <other commit>
+    python benchmarks/bench_pipeline.py --sizes 1000 100000 1000000 --compare before.json
+
+``--compare`` prints the change per stage and exits with status 1 when a stage got
+slower by more than ``--threshold`` (default 10%) and ``--min-delta`` seconds (default
+5 ms, so timer noise on tiny stages is not reported).
+"""
+import argparse
+import datetime as dt
+import json
+import os
+import platform
+import subprocess
+import sys
+import time
+import tracemalloc
+import typing as t
+
+import numpy as np
+import pandas as pd
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from aggregate import location_counts  # noqa: E402
+from export import export_buffer, frame_chunks  # noqa: E402
+from matching import apply_region_filter, apply_text_filter  # noqa: E402
+from query import build_query  # noqa: E402
+from render import card_html, cards_html  # noqa: E402
+from scraper import fetch_rows  # noqa: E402
+from sources import SyntheticSource, synthetic_frame  # noqa: E402
+
+QUERY = build_query('("ui designer" OR "ux designer" OR "product designer")')
+REGIONS = "India, Remote, Bengaluru, USA"
+TEXT_TERMS = "figma, contract, remote"
+PAGE_SIZE = 25
+
+
+def stage_fetch(df: pd.DataFrame) -> pd.DataFrame:
+    return pd.DataFrame(fetch_rows(SyntheticSource(volume=len(df), seed=1), QUERY, len(df)))
+
+
+def stage_filter_region(df: pd.DataFrame) -> pd.DataFrame:
+    return apply_region_filter(df, REGIONS)
+
+
+def stage_filter_text(df: pd.DataFrame) -> pd.DataFrame:
+    return apply_text_filter(df, TEXT_TERMS)
+
+
+def stage_render_page(df: pd.DataFrame) -> str:
+    return cards_html(df.head(PAGE_SIZE))
+
+
+def stage_render_all(df: pd.DataFrame) -> str:
+    return cards_html(df)
+
+
+def stage_render_per_card(df: pd.DataFrame) -> str:
+    # What one st.markdown per tweet_card used to pay, minus Streamlit itself.
+    cols = [df[c].tolist() for c in ("display_name", "handle", "text", "url", "location")]
+    return "".join(card_html(*row) for row in zip(*cols))
+
+
+def stage_export_csv(df: pd.DataFrame) -> str:
+    return df.to_csv(index=False)
+
+
+def stage_export_csv_chunked(df: pd.DataFrame):
+    return export_buffer(frame_chunks(df), "csv")
+
+
+def stage_export_parquet(df: pd.DataFrame):
+    return export_buffer(frame_chunks(df), "parquet")
+
+
+def stage_export_jsonl(df: pd.DataFrame):
+    return export_buffer(frame_chunks(df), "jsonl")
+
+
+def stage_chart_counts(df: pd.DataFrame) -> pd.DataFrame:
+    return location_counts(df, top=15)
+
+
+STAGES: t.Dict[str, t.Callable[[pd.DataFrame], t.Any]] = {
+    "fetch": stage_fetch,
+    "filter_region": stage_filter_region,
+    "filter_text": stage_filter_text,
+    "render_page": stage_render_page,
+    "render_all": stage_render_all,
+    "render_per_card": stage_render_per_card,
+    "export_csv": stage_export_csv,
+    "export_csv_chunked": stage_export_csv_chunked,
+    "export_parquet": stage_export_parquet,
+    "export_jsonl": stage_export_jsonl,
+    "chart_counts": stage_chart_counts,
+}
+# Rendering every card builds the whole HTML document in memory (~0.4 GB per 100k rows
+# with intermediates); the app only ever renders a page, so these stop at 100k rows.
+MAX_ROWS = {"render_all": 100_000, "render_per_card": 100_000}
+
+
+def measure(fn: t.Callable[[pd.DataFrame], t.Any], df: pd.DataFrame, repeat: int) -> t.Dict[str, float]:
+    tracemalloc.start()
+    fn(df)
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    times = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        fn(df)
+        times.append(time.perf_counter() - started)
+    return {"seconds": min(times), "median_seconds": float(np.median(times)), "peak_mb": peak / 1e6}
+
+
+def git_revision() -> str:
+    try:
+        rev = subprocess.run(["git", "rev-parse", "--short", "HEAD"], cwd=ROOT, capture_output=True, text=True, check=True).stdout.strip()
+        dirty = subprocess.run(["git", "status", "--porcelain", "--untracked-files=no"], cwd=ROOT, capture_output=True, text=True).stdout.strip()
+        return rev + ("-dirty" if dirty else "")
+    except (OSError, subprocess.CalledProcessError):
+        return "unknown"
+
+
+def run(sizes: t.List[int], stages: t.List[str], repeat: int) -> dict:
+    report = {
+        "revision": git_revision(),
+        "created": dt.datetime.now(dt.timezone.utc).isoformat(timespec="seconds"),
+        "python": platform.python_version(),
+        "pandas": pd.__version__,
+        "numpy": np.__version__,
+        "machine": f"{platform.system()} {platform.machine()}",
+        "repeat": repeat,
+        "results": [],
+    }
+    for n in sizes:
+        df = synthetic_frame(n, seed=1, end=1.7e9)
+        for name in stages:
+            if n > MAX_ROWS.get(name, n):
+                print(f"{name:>16} {n:>10,} {'skipped':>10}", flush=True)
+                continue
+            result = {"stage": name, "rows": n, **measure(STAGES[name], df, repeat)}
+            report["results"].append(result)
+            print(f"{name:>16} {n:>10,} {result['seconds']:>9.4f}s {result['peak_mb']:>9.1f} MB", flush=True)
+    return report
+
+
+def compare(base: dict, head: dict, threshold: float, min_delta: float = 0.005) -> bool:
+    """Print per-stage changes; True if any stage slowed down by more than ``threshold``
+    (relative) and ``min_delta`` seconds."""
+    before = {(r["stage"], r["rows"]): r for r in base["results"]}
+    print(f"\n{base['revision']} -> {head['revision']}")
+    print(f"{'stage':>16} {'rows':>10} {'before':>10} {'after':>10} {'change':>8} {'peak MB':>17}")
+    regressed = False
+    for r in head["results"]:
+        b = before.get((r["stage"], r["rows"]))
+        if b is None:
+            continue
+        change = r["seconds"] / b["seconds"] - 1 if b["seconds"] else 0.0
+        flag = " !" if change > threshold and r["seconds"] - b["seconds"] > min_delta else ""
+        regressed |= bool(flag)
+        print(
+            f"{r['stage']:>16} {r['rows']:>10,} {b['seconds']:>9.4f}s {r['seconds']:>9.4f}s {change:>+7.0%}"
+            f" {b['peak_mb']:>7.1f} -> {r['peak_mb']:>6.1f}{flag}"
+        )
+    return regressed
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--sizes", type=int, nargs="+", default=[1_000, 100_000, 1_000_000])
+    parser.add_argument("--stages", nargs="+", choices=list(STAGES), default=list(STAGES))
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--out", help="write the JSON report here (default: benchmarks/results/<revision>.json)")
+    parser.add_argument("--compare", metavar="BASE_JSON", help="report from an earlier run to compare against")
+    parser.add_argument("--threshold", type=float, default=0.10, help="relative slowdown that counts as a regression")
+    parser.add_argument("--min-delta", type=float, default=0.005, help="ignore slowdowns smaller than this many seconds")
+    args = parser.parse_args()
+
+    print(f"{'stage':>16} {'rows':>10} {'time':>10} {'peak':>12}")
+    report = run(args.sizes, args.stages, args.repeat)
+    out = args.out or os.path.join(ROOT, "benchmarks", "results", f"{report['revision']}.json")
+    os.makedirs(os.path.dirname(os.path.abspath(out)), exist_ok=True)
+    with open(out, "w", encoding="utf-8") as f:
+        json.dump(report, f, indent=2)
+    print(f"Report written to {out}")
+
+    if args.compare:
+        with open(args.compare, encoding="utf-8") as f:
+            base = json.load(f)
+        if compare(base, report, args.threshold, args.min_delta):
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,105 @@
+"""Region filter benchmark: original ``any(...)`` loop vs regex alternation vs Aho–Corasick,
+plus the canonical-region lookups that replaced them.
+
+    python benchmarks/bench_region_filter.py --rows 200000 --regions 5 50 200
+
+Both column dtypes are measured: ``object`` (pandas 2 default) and ``str`` (Arrow-backed,
+pandas 3 default), since the regex path runs on a different engine for each. The substring
+strategies are checked against each other. The gazetteer ones (``geo.region_mask``, and a
+lookup in a prebuilt ``geo.RegionIndex``) match by region instead, so they only report time.
+"""
+import argparse
+import os
+import re
+import sys
+import time
+
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from geo import RegionIndex, region_mask  # noqa: E402
+from matching import AhoCorasick  # noqa: E402
+
+CITIES = [
+    "Bengaluru", "Bangalore", "Mumbai", "Pune", "Delhi", "Gurugram", "Noida", "Hyderabad", "Chennai",
+    "Kolkata", "Ahmedabad", "Jaipur", "San Francisco", "New York", "Austin", "Seattle", "London",
+    "Berlin", "Amsterdam", "Toronto", "Sydney", "Singapore", "Dubai", "Lisbon", "Remote",
+]
+COUNTRIES = ["India", "IN", "USA", "US", "UK", "Germany", "Canada", "Australia", "UAE", "Portugal", ""]
+
+
+def make_locations(n: int, seed: int = 0) -> pd.Series:
+    rng = np.random.default_rng(seed)
+    city = np.array(CITIES)[rng.integers(0, len(CITIES), n)]
+    country = np.array(COUNTRIES)[rng.integers(0, len(COUNTRIES), n)]
+    # A share of free-form profile strings keeps the number of distinct values realistic.
+    noise = np.char.add(" ", rng.integers(0, 5000, n).astype(str))
+    loc = np.char.add(np.char.add(city, ", "), country)
+    loc = np.where(rng.random(n) < 0.3, np.char.add(loc, noise), loc)
+    loc = np.where(rng.random(n) < 0.2, "", loc)
+    return pd.Series(loc, dtype=object)
+
+
+def make_regions(k: int, seed: int = 1) -> list:
+    rng = np.random.default_rng(seed)
+    vocab = [c.lower() for c in CITIES + COUNTRIES if c]
+    extra = [f"region{i}" for i in range(max(0, k - len(vocab)))]
+    pool = vocab + extra
+    return [pool[i] for i in rng.permutation(len(pool))[:k]]
+
+
+def any_loop(locations: pd.Series, regions: list) -> pd.Series:
+    # The original apply_region_filter implementation.
+    def matches(loc: str) -> bool:
+        loc_l = (loc or "").lower()
+        return any(r in loc_l for r in regions)
+    return locations.apply(matches)
+
+
+def regex(locations: pd.Series, regions: list) -> pd.Series:
+    pattern = "|".join(re.escape(r) for r in regions)
+    return locations.fillna("").str.lower().str.contains(pattern, regex=True)
+
+
+def aho_corasick(locations: pd.Series, regions: list) -> pd.Series:
+    return AhoCorasick(regions).contains(locations)
+
+
+def best_of(fn, *args, repeat: int = 3) -> float:
+    times = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        fn(*args)
+        times.append(time.perf_counter() - started)
+    return min(times)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--rows", type=int, default=200_000)
+    parser.add_argument("--regions", type=int, nargs="+", default=[5, 25, 50, 200])
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+
+    base = make_locations(args.rows)
+    print(f"{args.rows:,} rows, {base.nunique():,} distinct locations")
+    print(f"{'dtype':>6} {'regions':>8} {'any() loop':>12} {'regex':>10} {'aho-corasick':>13} {'gazetteer':>10} {'index':>9}")
+    for dtype in ("object", "str"):
+        locations = base.astype(dtype)
+        started = time.perf_counter()
+        index = RegionIndex(pd.DataFrame({"location": locations}))
+        print(f"{dtype:>6} RegionIndex built in {time.perf_counter() - started:.3f}s")
+        for k in args.regions:
+            regions = make_regions(k)
+            expected = any_loop(locations, regions)
+            assert (regex(locations, regions).to_numpy(bool) == expected.to_numpy(bool)).all()
+            assert (aho_corasick(locations, regions).to_numpy(bool) == expected.to_numpy(bool)).all()
+            row = [best_of(fn, locations, regions, repeat=args.repeat) for fn in (any_loop, regex, aho_corasick, region_mask)]
+            row.append(best_of(index.mask, regions, repeat=args.repeat))
+            print(f"{dtype:>6} {k:>8} {row[0]:>11.3f}s {row[1]:>9.3f}s {row[2]:>12.3f}s {row[3]:>9.3f}s {row[4]:>8.4f}s")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,207 @@
+"""In-process result cache for scraped tweets.
+
+Kept out of ``app.py`` because Streamlit re-executes the script on every rerun.
+The app holds one cache per process (``st.cache_resource``), shared by all
+sessions, so every method is thread-safe. ``get_or_load`` coalesces concurrent
+misses for the same query into a single scrape.
+"""
+import threading
+import time
+import typing as t
+from collections import OrderedDict
+from concurrent.futures import Future
+from dataclasses import dataclass
+
+import numpy as np
+import pandas as pd
+
+
+def normalize_query(query: str) -> str:
+    """Collapse whitespace so cosmetic edits hit the same entry.
+
+    Case is preserved on purpose: Twitter only treats upper-case ``OR`` as an operator.
+    """
+    return " ".join((query or "").split())
+
+
+def frame_fingerprint(df: pd.DataFrame) -> t.Tuple[t.Any, ...]:
+    """Identity of a tweet frame for derived-result caches: size, columns and an
+    order-sensitive hash of the tweet IDs (URLs when there is no ``id`` column).
+
+    Tweets are treated as immutable, so equal IDs in the same order mean equal rows.
+    """
+    ids = df["id"] if "id" in df else df["url"] if "url" in df else pd.Series(dtype=object)
+    hashes = pd.util.hash_pandas_object(ids, index=False).to_numpy()
+    # Weighting by position makes reordered rows hash differently; uint64 wraps silently.
+    digest = int((hashes * np.arange(1, len(hashes) + 1, dtype=np.uint64)).sum(dtype=np.uint64))
+    return (len(df), tuple(df.columns), digest)
+
+
+@dataclass
+class _Entry:
+    df: pd.DataFrame
+    limit: int
+    created: float
+    nbytes: int
+
+    @property
+    def complete(self) -> bool:
+        # The scraper ran dry before reaching the limit, so any larger limit would get the same rows.
+        return len(self.df) < self.limit
+
+    @property
+    def max_id(self) -> t.Optional[int]:
+        if "id" not in self.df or self.df.empty:
+            return None
+        return int(self.df["id"].max())
+
+
+class ResultCache:
+    """TTL + byte-bounded LRU cache of scrape results keyed on (normalized query, limit).
+
+    A lookup for a smaller limit is served from a larger entry of the same query.
+    Expired entries are no longer served but stay (until LRU eviction) as the base
+    for incremental refreshes, see ``latest``.
+    """
+
+    def __init__(self, ttl: float = 300.0, max_bytes: int = 64 * 1024 * 1024):
+        self.ttl = ttl
+        self._max_bytes = max_bytes
+        self._entries: "OrderedDict[t.Tuple[str, int], _Entry]" = OrderedDict()
+        self._inflight: t.Dict[t.Tuple[str, int], Future] = {}
+        self._lock = threading.RLock()
+        self.nbytes = 0
+        self.hits = 0
+        self.misses = 0
+        self.coalesced = 0
+        self.evictions = 0
+
+    # ---------- Sizing ----------
+    @property
+    def max_bytes(self) -> int:
+        return self._max_bytes
+
+    @max_bytes.setter
+    def max_bytes(self, value: int):
+        with self._lock:
+            self._max_bytes = value
+            self._evict()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    @property
+    def hit_ratio(self) -> float:
+        total = self.hits + self.misses
+        return self.hits / total if total else 0.0
+
+    # ---------- Lookup ----------
+    def _expired(self, entry: _Entry, now: float) -> bool:
+        return self.ttl is not None and now - entry.created > self.ttl
+
+    def _find(self, query: str, limit: int) -> t.Optional[t.Tuple[str, int]]:
+        now = time.time()
+        best = None
+        for key, entry in list(self._entries.items()):
+            if key[0] != query or self._expired(entry, now):
+                continue
+            if entry.limit >= limit or entry.complete:
+                if best is None or entry.limit < self._entries[best].limit:
+                    best = key
+        return best
+
+    def _hit(self, key: t.Tuple[str, int], limit: int) -> pd.DataFrame:
+        self._entries.move_to_end(key)
+        self.hits += 1
+        return self._entries[key].df.head(limit)
+
+    def get(self, query: str, limit: int) -> t.Optional[pd.DataFrame]:
+        with self._lock:
+            key = self._find(normalize_query(query), limit)
+            if key is None:
+                self.misses += 1
+                return None
+            return self._hit(key, limit)
+
+    def peek(self, query: str) -> t.Optional[_Entry]:
+        """Largest unexpired entry for ``query``, whatever its limit; not counted as a hit or miss."""
+        q = normalize_query(query)
+        now = time.time()
+        with self._lock:
+            keys = [k for k, e in self._entries.items() if k[0] == q and not self._expired(e, now)]
+            if not keys:
+                return None
+            key = max(keys, key=lambda k: k[1])
+            self._entries.move_to_end(key)
+            return self._entries[key]
+
+    def get_or_load(self, query: str, limit: int, load: t.Callable[[], pd.DataFrame]) -> pd.DataFrame:
+        """Cached result for (query, limit), else the result of ``load()``.
+
+        Concurrent callers missing on the same query wait for the one ``load()`` already
+        running (if it fetches at least ``limit`` rows) instead of starting their own.
+        ``load`` is responsible for ``put``-ing what it fetched. Exceptions from
+        ``load`` propagate to every waiter.
+        """
+        q = normalize_query(query)
+        with self._lock:
+            key = self._find(q, limit)
+            if key is not None:
+                return self._hit(key, limit)
+            pending = next((f for (pq, pl), f in self._inflight.items() if pq == q and pl >= limit), None)
+            if pending is None:
+                self.misses += 1
+                pending = self._inflight[(q, limit)] = Future()
+                leader = True
+            else:
+                self.coalesced += 1
+                leader = False
+        if not leader:
+            return pending.result().head(limit)
+        try:
+            df = load()
+            pending.set_result(df)
+            return df
+        except BaseException as e:
+            pending.set_exception(e)
+            raise
+        finally:
+            with self._lock:
+                self._inflight.pop((q, limit), None)
+
+    def latest(self, query: str) -> t.Optional[_Entry]:
+        """Largest entry for ``query`` regardless of age; not counted as a hit or miss."""
+        q = normalize_query(query)
+        with self._lock:
+            entries = [e for k, e in self._entries.items() if k[0] == q]
+        return max(entries, key=lambda e: e.limit) if entries else None
+
+    def put(self, query: str, limit: int, df: pd.DataFrame):
+        q = normalize_query(query)
+        nbytes = int(df.memory_usage(deep=True).sum())
+        with self._lock:
+            if nbytes > self._max_bytes:
+                return
+            # A larger result subsumes smaller ones for the same query.
+            for key in [k for k in self._entries if k[0] == q and k[1] <= limit]:
+                self._drop(key)
+            key = (q, limit)
+            self._entries[key] = _Entry(df=df, limit=limit, created=time.time(), nbytes=nbytes)
+            self.nbytes += nbytes
+            self._evict()
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self.nbytes = 0
+
+    # ---------- Internals ----------
+    def _drop(self, key: t.Tuple[str, int]):
+        entry = self._entries.pop(key)
+        self.nbytes -= entry.nbytes
+
+    def _evict(self):
+        while self.nbytes > self._max_bytes and self._entries:
+            key = next(iter(self._entries))
+            self._drop(key)
+            self.evictions += 1
@@ -0,0 +1,159 @@
+"""Asyncio engine that runs several searches at once.
+
+Each job runs a blocking fetcher in a worker thread of a pool owned by the run; a
+coroutine-function fetcher is awaited directly instead. A semaphore bounds how many
+jobs run at a time and every job has its own timeout. ``cancel()``, or an exception
+raised by the progress callback (such as Streamlit's rerun signal when the user
+changes an input), stops all of them. Threads cannot be killed, so blocking fetchers
+get a ``should_stop`` callable and are expected to check it between tweets, as
+``scraper.iter_rows`` does. A fetcher that does not (say, one stuck in a network
+call) is abandoned: ``run`` returns on time and the pool is shut down without
+waiting, so the thread finishes in the background.
+
+A fetcher is any callable ``(query, limit, since_id, should_stop) -> rows`` (a list
+of row dicts or a DataFrame), so a fake is a plain function; ``fetcher_for`` wraps a
+``sources.TweetSource``.
+"""
+import asyncio
+import functools
+import threading
+import time
+import typing as t
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, field
+
+import pandas as pd
+
+from scraper import FetchOptions, fetch, fetch_rows
+from sources import TweetSource
+
+Fetcher = t.Callable[[str, int, t.Optional[int], t.Callable[[], bool]], t.Any]
+
+
+@dataclass
+class FetchJob:
+    query: str
+    limit: int
+    since_id: t.Optional[int] = None
+
+
+@dataclass
+class JobResult:
+    job: FetchJob
+    df: pd.DataFrame = field(default_factory=pd.DataFrame)
+    status: str = "pending"  # "ok", "error", "timeout" or "cancelled"
+    error: t.Optional[BaseException] = None
+    elapsed: float = 0.0
+
+    @property
+    def ok(self) -> bool:
+        return self.status == "ok"
+
+
+def fetcher_for(source: TweetSource, options: t.Optional[FetchOptions] = None) -> Fetcher:
+    """Fetcher backed by a tweet source. Serial fetches stop between tweets when cancelled;
+    sharded and OR-split fetches run their own thread pools and only stop at the end."""
+    options = options or FetchOptions()
+
+    def fetcher(query: str, limit: int, since_id: t.Optional[int], should_stop: t.Callable[[], bool]):
+        if options.mode == "serial":
+            return fetch_rows(source, query, limit, since_id, should_stop)
+        return fetch(source, query, limit, options, since_id)
+
+    return fetcher
+
+
+class FetchEngine:
+    def __init__(self, fetcher: Fetcher, concurrency: int = 4, timeout: t.Optional[float] = 60.0):
+        self.fetcher = fetcher
+        self.concurrency = concurrency
+        self.timeout = timeout
+        self._stop = threading.Event()
+        self._loop: t.Optional[asyncio.AbstractEventLoop] = None
+        self._tasks: t.List[asyncio.Task] = []
+
+    def cancel(self):
+        """Stop every running job; safe to call from any thread."""
+        self._stop.set()
+        loop = self._loop
+        if loop is not None and not loop.is_closed():
+            loop.call_soon_threadsafe(self._cancel_tasks)
+
+    def _cancel_tasks(self):
+        for task in self._tasks:
+            task.cancel()
+
+    async def _run_job(self, job: FetchJob, limiter: asyncio.Semaphore, executor: ThreadPoolExecutor) -> JobResult:
+        result = JobResult(job)
+        done = threading.Event()
+
+        def should_stop() -> bool:
+            return done.is_set() or self._stop.is_set()
+
+        started = time.perf_counter()
+        try:
+            async with limiter:
+                started = time.perf_counter()
+                if asyncio.iscoroutinefunction(self.fetcher):
+                    pending = self.fetcher(job.query, job.limit, job.since_id, should_stop)
+                else:
+                    call = functools.partial(self.fetcher, job.query, job.limit, job.since_id, should_stop)
+                    pending = asyncio.get_running_loop().run_in_executor(executor, call)
+                rows = await asyncio.wait_for(pending, self.timeout)
+            result.df = rows if isinstance(rows, pd.DataFrame) else pd.DataFrame(rows)
+            result.status = "ok"
+        except asyncio.TimeoutError:
+            result.status = "timeout"
+        except asyncio.CancelledError:
+            result.status = "cancelled"
+        except Exception as e:
+            result.status, result.error = "error", e
+        finally:
+            # A timed-out or cancelled thread keeps running until it next checks should_stop.
+            done.set()
+            result.elapsed = time.perf_counter() - started
+        return result
+
+    async def run_async(
+        self,
+        jobs: t.Sequence[FetchJob],
+        on_progress: t.Optional[t.Callable[[int, int], None]] = None,
+        tick: float = 0.25,
+    ) -> t.List[JobResult]:
+        """Run ``jobs`` and return their results in order.
+
+        ``on_progress(done, total)`` is called on the event loop thread after each job
+        finishes and at least every ``tick`` seconds. If it raises, the remaining jobs
+        are cancelled and the exception propagates.
+        """
+        self._stop.clear()
+        self._loop = asyncio.get_running_loop()
+        limiter = asyncio.Semaphore(max(1, self.concurrency))
+        # One thread per job at most, so a thread still stuck in an abandoned job never
+        # delays a later one; the semaphore bounds how many run at a time.
+        executor = ThreadPoolExecutor(max_workers=max(1, len(jobs)), thread_name_prefix="fetch-engine")
+        tasks = self._tasks = [asyncio.ensure_future(self._run_job(job, limiter, executor)) for job in jobs]
+        try:
+            pending = set(tasks)
+            while pending:
+                _, pending = await asyncio.wait(pending, timeout=tick, return_when=asyncio.FIRST_COMPLETED)
+                if on_progress is not None:
+                    on_progress(len(tasks) - len(pending), len(tasks))
+        except BaseException:
+            self._stop.set()
+            self._cancel_tasks()
+            await asyncio.gather(*tasks, return_exceptions=True)
+            raise
+        finally:
+            self._tasks = []
+            self._loop = None
+            executor.shutdown(wait=False, cancel_futures=True)
+        return [task.result() for task in tasks]
+
+    def run(
+        self,
+        jobs: t.Sequence[FetchJob],
+        on_progress: t.Optional[t.Callable[[int, int], None]] = None,
+    ) -> t.List[JobResult]:
+        """Blocking wrapper around ``run_async`` for callers without an event loop."""
+        return asyncio.run(self.run_async(list(jobs), on_progress))
@@ -0,0 +1,259 @@
+"""Exports that never build the whole file in memory: CSV (plain, gzip, zstd), Parquet,
+Arrow IPC and JSON Lines.
+
+Every format has a streaming writer that consumes a sequence of frames
+(``frame_chunks`` of an in-memory frame, or ``TweetStore.iter_chunks`` straight from
+the local store) one chunk at a time. Written to a file, exporting the whole store
+takes a fixed amount of memory; that is what the CLI does:
+
+    python export.py --store tweets.db --query '"ux designer" lang:en' --region "India, Remote" -o jobs.csv
+    python export.py -o jobs.parquet
+
+The dashboard's download buttons call ``export_buffer`` only when clicked and keep the
+result in an ``ExportCache`` keyed by format and filter state, so clicking again (or
+another session with the same filters) reuses the bytes. Streamlit keeps downloads in
+memory, so there the cost is the file plus one chunk.
+
+Parquet, Arrow and zstd need pyarrow; ``available_formats`` lists what can be written.
+"""
+import argparse
+import gzip
+import io
+import os
+import sys
+import threading
+import typing as t
+from collections import OrderedDict
+from dataclasses import dataclass
+
+import pandas as pd
+
+from lazy import optional_import
+from matching import apply_region_filter, apply_text_filter
+from store import TweetStore
+
+# ~2.5 MB of CSV per chunk; pandas' formatting intermediates keep the peak around 40 MB.
+CHUNK_ROWS = 10_000
+# Parquet row groups much smaller than this compress poorly, so chunks are buffered up to it.
+PARQUET_ROW_GROUP = 64 * 1024
+
+Chunks = t.Iterable[pd.DataFrame]
+
+
+def frame_chunks(df: pd.DataFrame, chunksize: int = CHUNK_ROWS) -> t.Iterator[pd.DataFrame]:
+    """Row slices of ``df`` (views, not copies); an empty frame is yielded once so its header is written."""
+    if df.empty:
+        yield df
+        return
+    for start in range(0, len(df), chunksize):
+        yield df.iloc[start:start + chunksize]
+
+
+def filtered_chunks(chunks: Chunks, region: str = "", text_terms: str = "") -> t.Iterator[pd.DataFrame]:
+    """Apply the dashboard's region and text filters to each chunk."""
+    for chunk in chunks:
+        yield apply_text_filter(apply_region_filter(chunk, region), text_terms)
+
+
+# ---------- Writers ----------
+def iter_csv(chunks: Chunks) -> t.Iterator[str]:
+    """CSV text per chunk, with the header once; later chunks use the first chunk's columns."""
+    columns = None
+    for chunk in chunks:
+        if columns is None:
+            columns = list(chunk.columns)
+            yield chunk.to_csv(index=False)
+        elif not chunk.empty:
+            yield chunk.reindex(columns=columns).to_csv(index=False, header=False)
+
+
+def write_csv(chunks: Chunks, out: t.BinaryIO) -> None:
+    for text in iter_csv(chunks):
+        out.write(text.encode("utf-8"))
+
+
+def write_csv_gzip(chunks: Chunks, out: t.BinaryIO) -> None:
+    # mtime=0 keeps the output byte-identical for identical data.
+    with gzip.GzipFile(fileobj=out, mode="wb", mtime=0) as gz:
+        write_csv(chunks, gz)
+
+
+def write_csv_zstd(chunks: Chunks, out: t.BinaryIO) -> None:
+    # One zstd frame per chunk; concatenated frames are a valid zstd stream.
+    codec = _arrow().Codec("zstd")
+    for text in iter_csv(chunks):
+        out.write(codec.compress(text.encode("utf-8"), asbytes=True))
+
+
+def write_jsonl(chunks: Chunks, out: t.BinaryIO) -> None:
+    for chunk in chunks:
+        if chunk.empty:
+            continue
+        text = chunk.to_json(orient="records", lines=True, date_format="iso", force_ascii=False)
+        out.write(text.encode("utf-8"))
+        if not text.endswith("\n"):
+            out.write(b"\n")
+
+
+def _arrow_tables(chunks: Chunks) -> t.Iterator[t.Any]:
+    """Arrow tables with the first chunk's schema (all-null columns typed as strings)."""
+    pa = _arrow()
+    schema = None
+    for chunk in chunks:
+        if schema is None:
+            schema = pa.Schema.from_pandas(chunk, preserve_index=False)
+            schema = pa.schema([pa.field(f.name, pa.string()) if pa.types.is_null(f.type) else f for f in schema])
+        elif chunk.empty:
+            continue
+        yield pa.Table.from_pandas(chunk, schema=schema, preserve_index=False)
+
+
+def write_parquet(chunks: Chunks, out: t.BinaryIO) -> None:
+    pa, pq = _arrow(), optional_import("pyarrow.parquet")
+    writer, pending, rows = None, [], 0
+    for table in _arrow_tables(chunks):
+        if writer is None:
+            writer = pq.ParquetWriter(out, table.schema, compression="zstd")
+        pending.append(table)
+        rows += table.num_rows
+        if rows >= PARQUET_ROW_GROUP:
+            writer.write_table(pa.concat_tables(pending), row_group_size=rows)
+            pending, rows = [], 0
+    if writer is not None:
+        if pending:
+            writer.write_table(pa.concat_tables(pending), row_group_size=max(1, rows))
+        writer.close()
+
+
+def write_arrow(chunks: Chunks, out: t.BinaryIO) -> None:
+    """Arrow IPC file format, which is also Feather v2."""
+    pa = _arrow()
+    writer = None
+    for table in _arrow_tables(chunks):
+        if writer is None:
+            options = pa.ipc.IpcWriteOptions(compression="zstd")
+            writer = pa.ipc.new_file(out, table.schema, options=options)
+        writer.write_table(table)
+    if writer is not None:
+        writer.close()
+
+
+def _has_arrow() -> bool:
+    return optional_import("pyarrow") is not None and optional_import("pyarrow.parquet") is not None
+
+
+def _arrow():
+    if not _has_arrow():
+        raise RuntimeError("This export format needs pyarrow (pip install pyarrow).")
+    return optional_import("pyarrow")
+
+
+@dataclass(frozen=True)
+class ExportFormat:
+    label: str
+    extension: str
+    mime: str
+    write: t.Callable[[Chunks, t.BinaryIO], None]
+    needs_arrow: bool = False
+
+
+EXPORT_FORMATS: t.Dict[str, ExportFormat] = {
+    "csv": ExportFormat("CSV", "csv", "text/csv", write_csv),
+    "csv.gz": ExportFormat("CSV (gzip)", "csv.gz", "application/gzip", write_csv_gzip),
+    "csv.zst": ExportFormat("CSV (zstd)", "csv.zst", "application/zstd", write_csv_zstd, needs_arrow=True),
+    "parquet": ExportFormat("Parquet", "parquet", "application/vnd.apache.parquet", write_parquet, needs_arrow=True),
+    "arrow": ExportFormat("Arrow IPC / Feather", "arrow", "application/vnd.apache.arrow.file", write_arrow, needs_arrow=True),
+    "jsonl": ExportFormat("JSON Lines", "jsonl", "application/x-ndjson", write_jsonl),
+}
+
+
+def available_formats() -> t.List[str]:
+    return [name for name, fmt in EXPORT_FORMATS.items() if not fmt.needs_arrow or _has_arrow()]
+
+
+def write_export(chunks: Chunks, out: t.Union[str, os.PathLike, t.BinaryIO], fmt: str = "csv") -> None:
+    """Stream ``chunks`` in format ``fmt`` (a key of ``EXPORT_FORMATS``) to a path or binary file."""
+    if isinstance(out, (str, os.PathLike)):
+        with open(out, "wb") as f:
+            return write_export(chunks, f, fmt)
+    EXPORT_FORMATS[fmt].write(chunks, out)
+
+
+def export_buffer(chunks: Chunks, fmt: str = "csv") -> io.BytesIO:
+    """The export in an in-memory binary buffer, rewound to the start (what ``st.download_button`` accepts)."""
+    buf = io.BytesIO()
+    write_export(chunks, buf, fmt)
+    buf.seek(0)
+    return buf
+
+
+class ExportCache:
+    """Byte-bounded LRU of finished exports keyed by (format, filter state).
+
+    Exports larger than ``max_bytes`` are returned but not kept.
+    """
+
+    def __init__(self, max_bytes: int = 128 * 1024 * 1024):
+        self.max_bytes = max_bytes
+        self._entries: "OrderedDict[t.Tuple[t.Any, ...], bytes]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.nbytes = 0
+        self.hits = 0
+        self.misses = 0
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def get(self, key: t.Tuple[t.Any, ...], build: t.Callable[[], io.BytesIO]) -> io.BytesIO:
+        """The export for ``key`` as a fresh buffer, calling ``build`` on a miss."""
+        with self._lock:
+            data = self._entries.get(key)
+            if data is not None:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return io.BytesIO(data)
+            self.misses += 1
+        data = build().getvalue()
+        if len(data) <= self.max_bytes:
+            with self._lock:
+                if key not in self._entries:
+                    self._entries[key] = data
+                    self.nbytes += len(data)
+                while self.nbytes > self.max_bytes:
+                    _, old = self._entries.popitem(last=False)
+                    self.nbytes -= len(old)
+        return io.BytesIO(data)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self.nbytes = 0
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Export stored tweets without loading them all into memory.")
+    parser.add_argument("--store", default=os.environ.get("TJD_STORE_PATH", "tweets.db"))
+    parser.add_argument("--query", help="only tweets collected for this search query (default: all)")
+    parser.add_argument("--region", default="", help="comma-separated location substrings")
+    parser.add_argument("--text", default="", help="comma-separated terms the tweet text must mention")
+    parser.add_argument("--format", choices=list(EXPORT_FORMATS), help="default: from the --out extension, else csv")
+    parser.add_argument("--chunksize", type=int, default=CHUNK_ROWS)
+    parser.add_argument("-o", "--out", default="-", help="output path (default: stdout)")
+    args = parser.parse_args()
+
+    fmt = args.format or next(
+        (name for name, f in EXPORT_FORMATS.items() if args.out.endswith("." + f.extension)), "csv"
+    )
+    store = TweetStore(args.store)
+    chunks = filtered_chunks(store.iter_chunks(args.query, args.chunksize), args.region, args.text)
+    if args.out == "-":
+        write_export(chunks, sys.stdout.buffer, fmt)
+    else:
+        write_export(chunks, args.out, fmt)
+        size = os.path.getsize(args.out) / 1024 / 1024
+        print(f"{size:.1f} MB of {EXPORT_FORMATS[fmt].label} written to {args.out}", file=sys.stderr)
+    store.close()
+
+
+if __name__ == "__main__":
+    main()
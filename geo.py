@@ -0,0 +1,325 @@
+"""Location normalization: raw profile locations -> canonical region codes.
+
+Profile locations are free text ("Bengaluru, India", "Bangalore", "BLR", "India",
+"🌍 everywhere"). A local gazetteer maps them to canonical codes: ISO country codes
+("IN"), ``<country>-<city>`` codes ("IN-BLR", a city also counts as its country)
+and "REMOTE". Matching is per word n-gram, so "Based in Berlin" finds Berlin but
+"Indiana" is not India. Short codes that are also ordinary words ("US", "UK", "NY")
+only match when written in upper case. Two-letter codes that are both a US state
+and another country ("IN", "DE", "CA", "CO", ...) are not interpreted at all:
+"Indianapolis, IN" is not India and "Toronto, CA" is Canada only.
+
+Every distinct location string is resolved once per process. ``RegionIndex`` is an
+inverted index from canonical code to the rows (and tweet IDs) of one frame, so a
+region filter is a set lookup instead of a substring scan over every row; region
+terms the gazetteer does not know fall back to substring matching over the distinct
+locations.
+
+Set ``TJD_GAZETTEER`` to a CSV with ``code,name,aliases`` columns (aliases separated
+by ``|``) to add places or aliases; a code with ``-`` is a city of the country before it.
+"""
+import csv
+import functools
+import os
+import re
+import threading
+import typing as t
+from collections import OrderedDict
+
+import numpy as np
+import pandas as pd
+
+from cache import frame_fingerprint
+
+REMOTE = "REMOTE"
+MAX_NGRAM = 3
+_MAX_CACHED = 100_000
+
+# code: (display name, lower-case aliases)
+_COUNTRIES: t.Dict[str, t.Tuple[str, t.Tuple[str, ...]]] = {
+    "IN": ("India", ("india", "bharat")),
+    "US": ("United States", ("usa", "united states", "united states of america")),
+    "GB": ("United Kingdom", ("uk", "united kingdom", "england", "great britain", "britain", "scotland", "wales")),
+    "CA": ("Canada", ("canada",)),
+    "DE": ("Germany", ("germany", "deutschland")),
+    "FR": ("France", ("france",)),
+    "NL": ("Netherlands", ("netherlands", "the netherlands", "holland")),
+    "SG": ("Singapore", ()),
+    "AE": ("United Arab Emirates", ("uae", "united arab emirates", "emirates")),
+    "AU": ("Australia", ("australia",)),
+    "NG": ("Nigeria", ("nigeria",)),
+    "PK": ("Pakistan", ("pakistan",)),
+    "BD": ("Bangladesh", ("bangladesh",)),
+    "LK": ("Sri Lanka", ("sri lanka",)),
+    "NP": ("Nepal", ("nepal",)),
+    "IE": ("Ireland", ("ireland",)),
+    "ES": ("Spain", ("spain", "españa")),
+    "IT": ("Italy", ("italy", "italia")),
+    "PT": ("Portugal", ("portugal",)),
+    "PL": ("Poland", ("poland", "polska")),
+    "SE": ("Sweden", ("sweden",)),
+    "CH": ("Switzerland", ("switzerland",)),
+    "JP": ("Japan", ("japan",)),
+    "BR": ("Brazil", ("brazil", "brasil")),
+    "MX": ("Mexico", ("mexico", "méxico")),
+    "KE": ("Kenya", ("kenya",)),
+    "ZA": ("South Africa", ("south africa",)),
+    "EG": ("Egypt", ("egypt",)),
+    "ID": ("Indonesia", ("indonesia",)),
+    "PH": ("Philippines", ("philippines",)),
+    "MY": ("Malaysia", ("malaysia",)),
+    "NZ": ("New Zealand", ("new zealand",)),
+}
+_CITIES: t.Dict[str, t.Tuple[str, t.Tuple[str, ...]]] = {
+    "IN-BLR": ("Bengaluru", ("bengaluru", "bangalore", "blr", "bengaluru urban")),
+    "IN-BOM": ("Mumbai", ("mumbai", "bombay", "navi mumbai", "thane")),
+    "IN-DEL": ("Delhi", ("delhi", "new delhi", "delhi ncr", "ncr")),
+    "IN-GGN": ("Gurugram", ("gurugram", "gurgaon")),
+    "IN-NOI": ("Noida", ("noida", "greater noida")),
+    "IN-PNQ": ("Pune", ("pune", "poona")),
+    "IN-HYD": ("Hyderabad", ("hyderabad", "secunderabad")),
+    "IN-MAA": ("Chennai", ("chennai", "madras")),
+    "IN-AMD": ("Ahmedabad", ("ahmedabad", "amdavad")),
+    "IN-CCU": ("Kolkata", ("kolkata", "calcutta")),
+    "IN-JAI": ("Jaipur", ("jaipur",)),
+    "IN-COK": ("Kochi", ("kochi", "cochin")),
+    "IN-IXC": ("Chandigarh", ("chandigarh",)),
+    "IN-IDR": ("Indore", ("indore",)),
+    "US-NYC": ("New York", ("new york", "new york city", "nyc", "manhattan", "brooklyn")),
+    "US-SFO": ("San Francisco", ("san francisco", "sf", "bay area", "sf bay area")),
+    "US-LAX": ("Los Angeles", ("los angeles",)),
+    "US-SEA": ("Seattle", ("seattle",)),
+    "US-AUS": ("Austin", ("austin",)),
+    "US-CHI": ("Chicago", ("chicago",)),
+    "US-BOS": ("Boston", ("boston",)),
+    "GB-LON": ("London", ("london",)),
+    "CA-YTO": ("Toronto", ("toronto",)),
+    "CA-YVR": ("Vancouver", ("vancouver",)),
+    "DE-BER": ("Berlin", ("berlin",)),
+    "DE-MUC": ("Munich", ("munich", "münchen")),
+    "FR-PAR": ("Paris", ("paris",)),
+    "NL-AMS": ("Amsterdam", ("amsterdam",)),
+    "SG-SIN": ("Singapore", ("singapore",)),
+    "AE-DXB": ("Dubai", ("dubai",)),
+    "AE-AUH": ("Abu Dhabi", ("abu dhabi",)),
+    "AU-SYD": ("Sydney", ("sydney",)),
+    "AU-MEL": ("Melbourne", ("melbourne",)),
+    "NG-LOS": ("Lagos", ("lagos",)),
+}
+_REMOTE_ALIASES = (
+    "remote", "anywhere", "worldwide", "everywhere", "global", "earth", "planet earth", "internet", "online",
+    "wfh", "work from home",
+)
+# Upper-case-only tokens: ISO and airport codes and US state abbreviations that are also words.
+# Left out on purpose, because they name a US state (or city) as well as another country or
+# region: IN (Indiana/India), IND (Indianapolis airport), DE (Delaware/Germany), CA
+# (California/Canada), CO (Colorado/Colombia), GA (Georgia/Gabon), IL (Illinois/Israel),
+# MA (Massachusetts/Morocco), WA (Washington/Western Australia) and LA (Louisiana/Los Angeles).
+_CODES = {
+    "US": "US", "UK": "GB", "UAE": "AE", "FR": "FR", "NL": "NL", "SG": "SG", "AU": "AU", "NG": "NG",
+    "BOM": "IN-BOM", "DEL": "IN-DEL", "HYD": "IN-HYD", "MAA": "IN-MAA", "SFO": "US-SFO",
+    "NY": "US", "TX": "US", "FL": "US", "NJ": "US",
+}
+_WORD = re.compile(r"[^\W\d_]+")
+
+
+class Place(t.NamedTuple):
+    codes: t.FrozenSet[str]  # most specific codes plus their parent countries
+    label: str               # display name of the first, most specific match
+
+
+class Gazetteer:
+    """Alias tables plus a per-string memo of resolved locations."""
+
+    def __init__(self, extra_path: t.Optional[str] = None):
+        self.names: t.Dict[str, str] = {REMOTE: "Remote"}
+        self.aliases: t.Dict[str, str] = {a: REMOTE for a in _REMOTE_ALIASES}
+        self.codes = dict(_CODES)
+        for table in (_COUNTRIES, _CITIES):
+            for code, (name, aliases) in table.items():
+                self._add(code, name, aliases)
+        if extra_path:
+            with open(extra_path, newline="", encoding="utf-8") as f:
+                for row in csv.DictReader(f):
+                    self._add(row["code"].strip(), row.get("name", "").strip(), (row.get("aliases") or "").split("|"))
+        self._memo: t.Dict[str, Place] = {}
+
+    def _add(self, code: str, name: str, aliases: t.Iterable[str]):
+        self.names[code] = name or self.names.get(code, code)
+        for alias in [name, *aliases]:
+            alias = " ".join(_WORD.findall(alias.lower()))
+            if alias:
+                self.aliases[alias] = code
+
+    def name(self, code: str) -> str:
+        return self.names.get(code, code)
+
+    def match(self, text: str) -> t.List[str]:
+        """Codes named in ``text``, in order, longest alias first at each word."""
+        words = _WORD.findall(text or "")
+        lower = [w.lower() for w in words]
+        found: t.List[str] = []
+        i = 0
+        while i < len(words):
+            for n in range(min(MAX_NGRAM, len(words) - i), 0, -1):
+                code = self.aliases.get(" ".join(lower[i:i + n]))
+                if code is None and n == 1:
+                    code = self.codes.get(words[i])
+                if code is not None:
+                    if code not in found:
+                        found.append(code)
+                    i += n
+                    break
+            else:
+                i += 1
+        return found
+
+    def resolve(self, location: str) -> Place:
+        """Canonical codes and display label of one raw location, memoized per string."""
+        place = self._memo.get(location)
+        if place is not None:
+            return place
+        found = self.match(location)
+        codes = set(found)
+        codes.update(code.split("-", 1)[0] for code in found if "-" in code)
+        # Label the most specific place: a city beats a country beats "Remote".
+        specific = sorted(found, key=lambda c: ("-" not in c, c == REMOTE))
+        label = self.name(specific[0]) if specific else " ".join((location or "").split())
+        place = Place(frozenset(codes), label)
+        if len(self._memo) >= _MAX_CACHED:
+            self._memo.clear()
+        self._memo[location] = place
+        return place
+
+    def term_codes(self, term: str) -> t.FrozenSet[str]:
+        """Codes a region-filter term asks for, without widening a city to its country."""
+        return frozenset(self.match(term))
+
+
+@functools.lru_cache(maxsize=None)
+def _gazetteer(extra_path: t.Optional[str]) -> Gazetteer:
+    return Gazetteer(extra_path)
+
+
+def gazetteer() -> Gazetteer:
+    """The process-wide gazetteer (built-in table plus ``TJD_GAZETTEER``)."""
+    return _gazetteer(os.environ.get("TJD_GAZETTEER") or None)
+
+
+def region_labels(locations: pd.Series) -> t.Tuple[np.ndarray, np.ndarray]:
+    """``(codes, labels)``: per-row factor codes and the canonical label of each distinct location."""
+    codes, uniques = pd.factorize(locations.fillna(""), sort=False)
+    g = gazetteer()
+    labels = np.array([g.resolve(u).label for u in uniques], dtype=object)
+    return codes, labels
+
+
+def _wanted(terms: t.Iterable[str], gaz: Gazetteer) -> t.Tuple[t.Set[str], t.List[str]]:
+    """Canonical codes asked for by ``terms``, and the terms the gazetteer does not know (lower-cased)."""
+    codes: t.Set[str] = set()
+    unknown: t.List[str] = []
+    for term in terms:
+        term_codes = gaz.term_codes(term)
+        codes.update(term_codes)
+        if not term_codes:
+            unknown.append(term.lower())
+    return codes, unknown
+
+
+def _location_hits(locations: t.Sequence[str], codes: t.Set[str], unknown: t.List[str], gaz: Gazetteer) -> np.ndarray:
+    """Per distinct location: in one of ``codes``, or containing one of the ``unknown`` terms."""
+    hits = np.zeros(len(locations), dtype=bool)
+    if codes:
+        hits |= np.fromiter((bool(codes & gaz.resolve(loc).codes) for loc in locations), dtype=bool, count=len(locations))
+    if unknown:
+        pattern = "|".join(re.escape(term) for term in unknown)
+        hits |= pd.Series(locations).str.lower().str.contains(pattern, regex=True).to_numpy(dtype=bool)
+    return hits
+
+
+def region_mask(locations: pd.Series, terms: t.Iterable[str]) -> np.ndarray:
+    """Rows of ``locations`` in any of ``terms``' regions, resolving each distinct location once (no index)."""
+    gaz = gazetteer()
+    codes, uniques = pd.factorize(locations.fillna(""), sort=False)
+    return _location_hits(uniques, *_wanted(terms, gaz), gaz)[codes]
+
+
+class RegionIndex:
+    """Inverted index from canonical region code to the rows of one frame."""
+
+    def __init__(self, df: pd.DataFrame, gaz: t.Optional[Gazetteer] = None):
+        self.gazetteer = gaz or gazetteer()
+        self.fingerprint = frame_fingerprint(df)
+        self.size = len(df)
+        codes, self._locations = pd.factorize(df["location"].fillna(""), sort=False)
+        self._ids = df["id"].to_numpy() if "id" in df else None
+        # Rows grouped by distinct location, then each location's rows filed under its codes.
+        order = np.argsort(codes, kind="stable")
+        bounds = np.searchsorted(codes[order], np.arange(len(self._locations) + 1))
+        self._by_location = [order[bounds[u]:bounds[u + 1]] for u in range(len(self._locations))]
+        by_code: t.Dict[str, t.List[int]] = {}
+        for u, location in enumerate(self._locations):
+            for code in self.gazetteer.resolve(location).codes:
+                by_code.setdefault(code, []).append(u)
+        self._by_code = {code: self._location_rows(us) for code, us in by_code.items()}
+
+    def _location_rows(self, location_ids: t.Iterable[int]) -> np.ndarray:
+        parts = [self._by_location[u] for u in location_ids]
+        return np.concatenate(parts) if parts else np.empty(0, dtype=np.intp)
+
+    def __len__(self) -> int:
+        return len(self._by_code)
+
+    def regions(self) -> t.Dict[str, int]:
+        """Rows per canonical code."""
+        return {code: len(rows) for code, rows in self._by_code.items()}
+
+    def mask(self, terms: t.Iterable[str]) -> np.ndarray:
+        """Boolean mask of rows in any of ``terms``' regions.
+
+        Terms the gazetteer does not know are matched as case-insensitive substrings
+        of the distinct locations.
+        """
+        out = np.zeros(self.size, dtype=bool)
+        codes, unknown = _wanted(terms, self.gazetteer)
+        for code in codes & self._by_code.keys():
+            out[self._by_code[code]] = True
+        if unknown:
+            hits = _location_hits(self._locations, set(), unknown, self.gazetteer)
+            out[self._location_rows(np.flatnonzero(hits))] = True
+        return out
+
+    def rows(self, terms: t.Iterable[str]) -> np.ndarray:
+        """Sorted positions of rows in any of ``terms``' regions."""
+        return np.flatnonzero(self.mask(terms))
+
+    def ids(self, terms: t.Iterable[str]) -> np.ndarray:
+        """Tweet IDs of the rows in any of ``terms``' regions."""
+        if self._ids is None:
+            raise KeyError("frame has no id column")
+        return self._ids[self.rows(terms)]
+
+
+class RegionIndexCache:
+    """Bounded LRU of ``RegionIndex`` per dataset key, rebuilt when the frame's rows change."""
+
+    def __init__(self, max_entries: int = 8):
+        self.max_entries = max_entries
+        self._entries: "OrderedDict[t.Hashable, RegionIndex]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.builds = 0
+
+    def get(self, key: t.Hashable, df: pd.DataFrame) -> RegionIndex:
+        with self._lock:
+            index = self._entries.get(key)
+            if index is not None and index.fingerprint == frame_fingerprint(df):
+                self._entries.move_to_end(key)
+                return index
+        index = RegionIndex(df)
+        with self._lock:
+            self.builds += 1
+            self._entries[key] = index
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+        return index
@@ -0,0 +1,28 @@
+"""Deferred, process-wide memoized imports for heavy optional dependencies.
+
+Streamlit re-executes ``app.py`` on every rerun, so an import attempt inside the
+script (especially a failing one, which rescans ``sys.path``) is paid again each
+time. Going through ``optional_import`` pays it once per process and only when the
+module is first needed.
+"""
+import functools
+import importlib
+import types
+import typing as t
+
+# Loaded up front when TJD_EAGER_IMPORTS=1 (the old startup behaviour).
+EAGER_IMPORTS = ("altair", "snscrape.modules.twitter")
+
+
+@functools.lru_cache(maxsize=None)
+def optional_import(name: str) -> t.Optional[types.ModuleType]:
+    """Import ``name`` once; None (also memoized) if it is missing or fails to import."""
+    try:
+        return importlib.import_module(name)
+    except Exception:
+        return None
+
+
+def preload():
+    for name in EAGER_IMPORTS:
+        optional_import(name)
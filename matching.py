@@ -0,0 +1,185 @@
+"""Filters for locations and tweet text.
+
+``apply_region_filter`` resolves each comma-separated region through the gazetteer
+in ``geo.py`` ("Bangalore", "BLR" and "Bengaluru" are one city, and "India" covers
+its cities) and looks the rows up in a ``RegionIndex``. Regions the gazetteer does
+not know are still case-insensitive substring matches.
+
+``substring_mask`` does plain substring matching (the text filter, and the region
+filter before canonical regions). Short term lists go through a single regex; long
+lists over object-dtype columns go through an Aho–Corasick automaton, which scans
+each distinct value once no matter how many terms were pasted. Arrow-backed string
+columns (pandas' default from 3.0) always take the regex path: Arrow evaluates it
+with RE2, which is already a linear-time automaton and beats the pure-Python one.
+See ``benchmarks/bench_region_filter.py``.
+
+``query_mask`` evaluates a whole search query locally, for sources that replay or
+generate tweets instead of asking Twitter.
+"""
+import functools
+import operator
+import re
+import typing as t
+from collections import deque
+
+import numpy as np
+import pandas as pd
+
+from geo import RegionIndex, region_mask
+from query import Node, parse
+
+# Below this many patterns the regex alternation beats the Python automaton on object columns.
+AHO_CORASICK_MIN_PATTERNS = 16
+
+
+class AhoCorasick:
+    """Multi-pattern substring matcher (case-insensitive unless ``case_sensitive``)."""
+
+    def __init__(self, patterns: t.Iterable[str], case_sensitive: bool = False):
+        self.case_sensitive = case_sensitive
+        self.patterns = list(dict.fromkeys(p if case_sensitive else p.lower() for p in patterns if p))
+        self._goto: t.List[t.Dict[str, int]] = [{}]
+        self._fail: t.List[int] = [0]
+        self._out: t.List[t.List[int]] = [[]]
+        for idx, pattern in enumerate(self.patterns):
+            state = 0
+            for ch in pattern:
+                nxt = self._goto[state].get(ch)
+                if nxt is None:
+                    nxt = len(self._goto)
+                    self._goto[state][ch] = nxt
+                    self._goto.append({})
+                    self._fail.append(0)
+                    self._out.append([])
+                state = nxt
+            self._out[state].append(idx)
+        self._build_failure_links()
+        self._accept = [bool(o) for o in self._out]
+
+    def _build_failure_links(self):
+        queue = deque(self._goto[0].values())
+        while queue:
+            state = queue.popleft()
+            for ch, nxt in self._goto[state].items():
+                queue.append(nxt)
+                f = self._fail[state]
+                while f and ch not in self._goto[f]:
+                    f = self._fail[f]
+                self._fail[nxt] = self._goto[f].get(ch, 0)
+                self._out[nxt] = self._out[nxt] + self._out[self._fail[nxt]]
+
+    def _prepare(self, text: str) -> str:
+        text = text or ""
+        return text if self.case_sensitive else text.lower()
+
+    def search(self, text: str) -> bool:
+        """True if any pattern occurs in ``text``."""
+        goto, fail, accept = self._goto, self._fail, self._accept
+        state = 0
+        for ch in self._prepare(text):
+            while state and ch not in goto[state]:
+                state = fail[state]
+            state = goto[state].get(ch, 0)
+            if accept[state]:
+                return True
+        return False
+
+    def findall(self, text: str) -> t.Set[str]:
+        """Every pattern that occurs in ``text``."""
+        goto, fail, out = self._goto, self._fail, self._out
+        found: t.Set[int] = set()
+        state = 0
+        for ch in self._prepare(text):
+            while state and ch not in goto[state]:
+                state = fail[state]
+            state = goto[state].get(ch, 0)
+            found.update(out[state])
+        return {self.patterns[i] for i in found}
+
+    def contains(self, values: pd.Series) -> pd.Series:
+        """Boolean mask of ``values`` containing any pattern; each distinct value is scanned once."""
+        if not self.patterns:
+            return pd.Series(False, index=values.index)
+        codes, uniques = pd.factorize(values.fillna(""), sort=False)
+        hits = np.fromiter((self.search(u) for u in uniques), dtype=bool, count=len(uniques))
+        return pd.Series(hits[codes], index=values.index)
+
+
+def split_terms(text: str) -> t.List[str]:
+    """Comma-separated input -> list of lowercased, non-empty terms."""
+    return [r.strip().lower() for r in (text or "").split(",") if r.strip()]
+
+
+def substring_mask(values: pd.Series, terms: t.List[str]) -> pd.Series:
+    """Case-insensitive "contains any of ``terms``" mask over a string Series."""
+    if len(terms) >= AHO_CORASICK_MIN_PATTERNS and values.dtype == object:
+        return AhoCorasick(terms).contains(values)
+    # One lowercased column and a single alternation regex instead of a Python loop per row;
+    # terms are escaped so matching stays plain substring search.
+    pattern = "|".join(re.escape(r) for r in terms)
+    return values.fillna("").str.lower().str.contains(pattern, regex=True)
+
+
+def apply_region_filter(df: pd.DataFrame, region_input: str, index: t.Optional[RegionIndex] = None) -> pd.DataFrame:
+    """Rows located in any of the comma-separated regions, in their original order.
+
+    Without ``index`` every distinct location is resolved once and the result gathered
+    per row; pass a prebuilt ``RegionIndex`` of ``df`` when the same frame is filtered
+    repeatedly, which makes each filter a few array lookups.
+    """
+    if not region_input.strip():
+        return df
+    regions = [r.strip() for r in region_input.split(",") if r.strip()]
+    if not regions:
+        return df
+    if index is None:
+        return df[region_mask(df["location"], regions)]
+    return df[index.mask(regions)]
+
+
+def apply_text_filter(df: pd.DataFrame, terms_input: str) -> pd.DataFrame:
+    """Keep tweets whose text mentions any of the comma-separated terms."""
+    terms = split_terms(terms_input)
+    if not terms:
+        return df
+    return df[substring_mask(df["text"], terms)]
+
+
+def _operator_mask(df: pd.DataFrame, raw: str) -> pd.Series:
+    key, _, value = raw.partition(":")
+    key = key.lower()
+    try:
+        if key == "since":
+            return df["date"] >= pd.Timestamp(value, tz="UTC")
+        if key == "until":
+            return df["date"] < pd.Timestamp(value, tz="UTC")
+    except ValueError:
+        pass
+    if key == "from":
+        return df["handle"].fillna("").str.lower() == "@" + value.lower().lstrip("@")
+    # lang:, exclude: and the rest describe metadata a local frame doesn't have.
+    return pd.Series(True, index=df.index)
+
+
+def query_mask(df: pd.DataFrame, query: str) -> pd.Series:
+    """Rows of ``df`` a Twitter search for ``query`` would return, approximately.
+
+    Terms and phrases are case-insensitive substring matches on the text; ``since:``,
+    ``until:`` and ``from:`` are applied; other operators match everything.
+    """
+    text = df["text"].fillna("").str.lower()
+
+    def evaluate(node: Node) -> pd.Series:
+        kind = node[0]
+        if kind == "term":
+            return text.str.contains(node[1].lower(), regex=False)
+        if kind == "op":
+            return _operator_mask(df, node[1])
+        if kind == "not":
+            return ~evaluate(node[1])
+        parts = [evaluate(c) for c in node[1]]
+        if not parts:
+            return pd.Series(True, index=df.index)
+        return functools.reduce(operator.and_ if kind == "and" else operator.or_, parts)
+
+    return evaluate(parse(query)).astype(bool)
@@ -0,0 +1,211 @@
+"""Background refresher that keeps saved queries warm in the local tweet store.
+
+The dashboard registers queries with ``TweetStore.save_query``; ``StorePoller``
+refreshes each one every ``interval`` seconds (± ``jitter``), fetching only tweets
+newer than the stored ones, so page loads just read the store. Queries are refreshed
+concurrently through ``engine.FetchEngine`` (``concurrency`` at a time, each bounded by
+``timeout``). It runs as a daemon thread inside the Streamlit process, or standalone:
+
+    python poller.py --db tweets.db --interval 300
+"""
+import argparse
+import logging
+import random
+import threading
+import time
+import typing as t
+from dataclasses import dataclass
+
+from engine import FetchEngine, FetchJob, JobResult, fetcher_for
+from lazy import optional_import
+from scraper import FetchOptions
+from sources import SnscrapeSource, TweetSource
+from store import TweetStore
+
+log = logging.getLogger(__name__)
+
+
+@dataclass
+class QueryStatus:
+    query: str
+    last_refresh: t.Optional[float] = None
+    last_new: int = 0
+    last_error: str = ""
+    refreshes: int = 0
+
+    def lag(self, now: t.Optional[float] = None) -> t.Optional[float]:
+        """Seconds since the last successful refresh."""
+        if self.last_refresh is None:
+            return None
+        return (now or time.time()) - self.last_refresh
+
+
+class StorePoller:
+    def __init__(
+        self,
+        store: TweetStore,
+        interval: float = 300.0,
+        jitter: float = 0.1,
+        options: t.Optional[FetchOptions] = None,
+        concurrency: int = 4,
+        timeout: t.Optional[float] = 120.0,
+        source: t.Optional[TweetSource] = None,
+    ):
+        self.store = store
+        self.interval = interval
+        self.jitter = jitter
+        self.options = options or FetchOptions()
+        self.concurrency = concurrency
+        self.timeout = timeout
+        self.source = source
+        self._status: t.Dict[str, QueryStatus] = {}
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._wake = threading.Event()
+        self._thread: t.Optional[threading.Thread] = None
+        self._engine: t.Optional[FetchEngine] = None
+        # The background thread and a "refresh now" from the page never overlap.
+        self._refreshing = threading.Lock()
+
+    # ---------- Lifecycle ----------
+    @property
+    def running(self) -> bool:
+        return self._thread is not None and self._thread.is_alive()
+
+    def start(self):
+        if self.running:
+            return
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, name="tweet-store-poller", daemon=True)
+        self._thread.start()
+
+    def stop(self, timeout: float = 5.0):
+        self._stop.set()
+        self._wake.set()
+        engine = self._engine
+        if engine is not None:
+            engine.cancel()
+        if self._thread is not None:
+            self._thread.join(timeout)
+
+    def wake(self):
+        """Refresh now instead of waiting for the rest of the interval."""
+        self._wake.set()
+
+    def next_delay(self) -> float:
+        spread = self.interval * self.jitter
+        return max(1.0, self.interval + random.uniform(-spread, spread))
+
+    def _run(self):
+        while not self._stop.is_set():
+            self.refresh_all()
+            self._wake.wait(self.next_delay())
+            self._wake.clear()
+
+    # ---------- Refreshing ----------
+    def _source(self) -> t.Optional[TweetSource]:
+        """The configured source, else live snscrape if it is installed."""
+        if self.source is not None:
+            return self.source
+        sntwitter = optional_import("snscrape.modules.twitter")
+        return SnscrapeSource(sntwitter) if sntwitter is not None else None
+
+    def refresh_all(self, on_progress: t.Optional[t.Callable[[int, int], None]] = None) -> int:
+        """Refresh every saved query concurrently; returns the number of tweets stored.
+
+        ``on_progress(done, total)`` is forwarded to ``FetchEngine.run``; if it raises,
+        the refreshes still running are cancelled and the exception propagates.
+        """
+        with self._refreshing:
+            saved = self.store.saved_queries()
+            if self._stop.is_set() or not saved:
+                return 0
+            jobs = [FetchJob(query, max_tweets, self.store.max_id(query)) for query, max_tweets in saved.items()]
+            source = self._source()
+            if source is None:
+                err = RuntimeError("snscrape is not installed")
+                return sum(self._record(JobResult(job, status="error", error=err)) for job in jobs)
+            self._engine = FetchEngine(fetcher_for(source, self.options), self.concurrency, self.timeout)
+            try:
+                results = self._engine.run(jobs, on_progress)
+            finally:
+                self._engine = None
+            return sum(self._record(result) for result in results)
+
+    def refresh(self, query: str, max_tweets: int) -> int:
+        """Fetch tweets newer than the stored ones for ``query``; returns the number stored."""
+        source = self._source()
+        job = FetchJob(query, max_tweets, self.store.max_id(query))
+        if source is None:
+            return self._record(JobResult(job, status="error", error=RuntimeError("snscrape is not installed")))
+        engine = FetchEngine(fetcher_for(source, self.options), 1, self.timeout)
+        return self._record(engine.run([job])[0])
+
+    def _record(self, result: JobResult) -> int:
+        query = result.job.query
+        with self._lock:
+            status = self._status.setdefault(query, QueryStatus(query))
+        error = ""
+        if result.ok:
+            try:
+                added = self.store.upsert(result.df, query)
+                self.store.mark_fetched(query)
+            except Exception as e:
+                error = f"{type(e).__name__}: {e}"
+        elif result.error is not None:
+            error = f"{type(result.error).__name__}: {result.error}"
+        else:
+            error = f"{result.status} after {result.elapsed:.0f}s"
+        if error:
+            log.warning("Refreshing %r failed: %s", query, error)
+            with self._lock:
+                status.last_error = error
+            return 0
+        with self._lock:
+            status.last_refresh = time.time()
+            status.last_new = added
+            status.last_error = ""
+            status.refreshes += 1
+        return added
+
+    def status(self) -> t.List[QueryStatus]:
+        """Snapshot per saved query; the refresh time falls back to the store's for queries
+        refreshed by another process."""
+        with self._lock:
+            known = dict(self._status)
+        out = []
+        for query in self.store.saved_queries():
+            s = known.get(query)
+            s = QueryStatus(**vars(s)) if s is not None else QueryStatus(query, last_refresh=self.store.fetched_at(query))
+            out.append(s)
+        return out
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Keep saved dashboard queries warm in the local tweet store.")
+    parser.add_argument("--db", default="tweets.db")
+    parser.add_argument("--interval", type=float, default=300.0, help="seconds between refreshes")
+    parser.add_argument("--jitter", type=float, default=0.1, help="random +/- fraction of the interval")
+    parser.add_argument("--concurrency", type=int, default=4, help="queries refreshed at the same time")
+    parser.add_argument("--timeout", type=float, default=120.0, help="seconds before a single refresh is abandoned")
+    parser.add_argument("--once", action="store_true", help="refresh every saved query once and exit")
+    args = parser.parse_args()
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s %(levelname)s %(message)s")
+
+    poller = StorePoller(
+        TweetStore(args.db), interval=args.interval, jitter=args.jitter,
+        concurrency=args.concurrency, timeout=args.timeout,
+    )
+    if args.once:
+        poller.refresh_all()
+        return
+    poller.start()
+    try:
+        while poller.running:
+            time.sleep(1)
+    except KeyboardInterrupt:
+        poller.stop()
+
+
+if __name__ == "__main__":
+    main()
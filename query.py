@@ -0,0 +1,191 @@
+"""Helpers for the Twitter search syntax typed into the keywords box.
+
+Only the subset the dashboard relies on is understood: quoted phrases, bare
+words, ``OR``, parentheses, ``-`` negation and ``key:value`` operators. As in
+Twitter's own search, implicit AND binds tighter than ``OR``.
+"""
+import re
+import typing as t
+
+QUERY_SUFFIX = "lang:en exclude:retweets exclude:replies"
+
+TOKEN_RE = re.compile(r'\s*(?:(\()|(\))|(-)(?=["(\w#@])|"([^"]*)"?|([^\s()"]+))')
+OPERATOR_RE = re.compile(r"^\w+:\S+$")
+
+# AST nodes are plain tuples: ("term", text, quoted), ("op", raw), ("not", node),
+# ("and", [nodes]) and ("or", [nodes]).
+Node = tuple
+
+
+def build_query(keywords: str) -> str:
+    """Full search query for the keywords box (language and retweet/reply filters appended).
+
+    Keywords with a top-level ``OR`` are parenthesized first; otherwise the filters
+    would bind to the last ``OR`` term only.
+    """
+    root = parse(keywords)
+    if root[0] == "or":
+        keywords = to_twitter(root, nested=True)
+    return f"{keywords} {QUERY_SUFFIX}"
+
+
+def _tokenize(text: str) -> t.List[t.Tuple[str, str]]:
+    tokens = []
+    for lp, rp, neg, phrase, word in TOKEN_RE.findall(text or ""):
+        if lp:
+            tokens.append(("(", lp))
+        elif rp:
+            tokens.append((")", rp))
+        elif neg:
+            tokens.append(("-", neg))
+        elif word == "OR":
+            tokens.append(("OR", word))
+        elif word:
+            tokens.append(("word", word))
+        elif phrase.strip():
+            tokens.append(("phrase", phrase))
+    return tokens
+
+
+def parse(text: str) -> Node:
+    tokens = _tokenize(text)
+    pos = 0
+
+    def peek() -> t.Optional[str]:
+        return tokens[pos][0] if pos < len(tokens) else None
+
+    def parse_or() -> Node:
+        nonlocal pos
+        children = [parse_and()]
+        while peek() == "OR":
+            pos += 1
+            children.append(parse_and())
+        children = [c for c in children if c != ("and", [])]
+        return children[0] if len(children) == 1 else ("or", children)
+
+    def parse_and() -> Node:
+        children = []
+        while peek() not in (None, ")", "OR"):
+            node = parse_unary()
+            if node is not None:
+                children.append(node)
+        return children[0] if len(children) == 1 else ("and", children)
+
+    def parse_unary() -> t.Optional[Node]:
+        nonlocal pos
+        kind, value = tokens[pos]
+        pos += 1
+        if kind == "-":
+            if peek() in (None, ")", "OR"):
+                return None
+            inner = parse_unary()
+            return ("not", inner) if inner is not None else None
+        if kind == "(":
+            node = parse_or()
+            if peek() == ")":
+                pos += 1
+            return node
+        if kind == "phrase":
+            return ("term", value, True)
+        if OPERATOR_RE.match(value):
+            return ("op", value)
+        return ("term", value, False)
+
+    root = ("and", [])
+    while pos < len(tokens):
+        node = parse_or()
+        if peek() == ")":  # stray closing paren
+            pos += 1
+        root = node if root == ("and", []) else ("and", [root, node])
+    return root
+
+
+def to_twitter(node: Node, nested: bool = False) -> str:
+    """Render an AST back to Twitter search syntax."""
+    kind = node[0]
+    if kind == "term":
+        return f'"{node[1]}"' if node[2] else node[1]
+    if kind == "op":
+        return node[1]
+    if kind == "not":
+        return "-" + to_twitter(node[1], nested=True)
+    if kind == "and":
+        s = " ".join(to_twitter(c, nested=True) for c in node[1])
+        return f"({s})" if nested and len(node[1]) > 1 else s
+    s = " OR ".join(to_twitter(c, nested=True) for c in node[1])
+    return f"({s})" if nested else s
+
+
+def split_or_terms(query: str) -> t.List[str]:
+    """Split a query on its top-level ``OR`` into standalone sub-queries.
+
+    Anything ANDed with a single OR group (such as the operators ``build_query``
+    appends) is repeated in every sub-query. Queries without a top-level OR come
+    back unchanged as a single item.
+    """
+    root = parse(query)
+    if root[0] == "or":
+        terms = [to_twitter(c) for c in root[1]]
+    elif root[0] == "and" and sum(c[0] == "or" for c in root[1]) == 1:
+        group = next(c for c in root[1] if c[0] == "or")
+        rest = [c for c in root[1] if c is not group]
+        terms = [to_twitter(("and", [c] + rest)) for c in group[1]]
+    else:
+        return [query]
+    return list(dict.fromkeys(terms))
+
+
+def to_fts(node: Node) -> t.Optional[str]:
+    """Render an AST as an SQLite FTS5 MATCH expression.
+
+    Every term is quoted so punctuation such as ``ui/ux`` is tokenized like the indexed
+    text. Search operators have no FTS meaning and are dropped; a group left with only
+    negations cannot be expressed in FTS5 and is dropped as well.
+    """
+    kind = node[0]
+    if kind == "term":
+        return '"' + node[1].replace('"', '""') + '"'
+    if kind in ("op", "not"):
+        return None
+    if kind == "or":
+        parts = [p for p in (to_fts(c) for c in node[1]) if p]
+        if not parts:
+            return None
+        return parts[0] if len(parts) == 1 else "(" + " OR ".join(parts) + ")"
+    positives = [p for p in (to_fts(c) for c in node[1] if c[0] != "not") if p]
+    if not positives:
+        return None
+    s = " AND ".join(positives)
+    for neg in (c[1] for c in node[1] if c[0] == "not"):
+        rendered = to_fts(neg)
+        if rendered:
+            s += " NOT " + rendered
+    return s if len(positives) == 1 and s == positives[0] else f"({s})"
+
+
+def keywords_to_fts(keywords: str) -> t.Optional[str]:
+    return to_fts(parse(keywords))
+
+
+def fts_dropped(node: Node) -> t.List[str]:
+    """Parts of an AST that ``to_fts`` leaves out, in Twitter syntax, so the user can be told."""
+    if node == ("and", []):
+        return []
+    if to_fts(node) is None:
+        return [to_twitter(node)]
+    kind = node[0]
+    if kind == "term":
+        return []
+    if kind == "not":
+        return fts_dropped(node[1])
+    out: t.List[str] = []
+    for child in node[1]:
+        if child[0] == "not" and kind == "and":
+            out += fts_dropped(child[1]) if to_fts(child[1]) is not None else [to_twitter(child)]
+        else:
+            out += fts_dropped(child)
+    return out
+
+
+def keywords_fts_dropped(keywords: str) -> t.List[str]:
+    return fts_dropped(parse(keywords))
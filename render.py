@@ -0,0 +1,130 @@
+"""HTML for tweet cards.
+
+``card_html`` renders one card; ``cards_html`` renders a whole frame column-wise and
+returns exactly ``"".join(card_html(...) for each row)``, so a page can be sent to
+the browser as a single markdown element. ``CardCache`` keeps rendered fragments
+across reruns so only tweets not seen before are rendered.
+"""
+import hashlib
+import string
+import threading
+import typing as t
+from collections import OrderedDict
+
+import pandas as pd
+
+CARD_TEMPLATE = '''
+    <a class="tweet-card" href="{url}" target="_blank" rel="noopener">
+      <div class="tweet-hdr">{display_name} <span class="tweet-handle">{handle}</span></div>
+      <div class="tweet-body">{safe_text}</div>
+      <div class="tweet-meta">📍 {location} <span class="badge">Open on X</span></div>
+    </a>
+    '''
+NO_LOCATION = "Location not specified"
+# Part of every CardCache key, so editing the template invalidates cached fragments.
+TEMPLATE_VERSION = hashlib.sha1(CARD_TEMPLATE.encode("utf-8")).hexdigest()[:12]
+
+# Convert line breaks for HTML (order matters: "&" first)
+_ESCAPES = [("&", "&amp;"), ("<", "&lt;"), (">", "&gt;"), ("\n", "<br>")]
+
+
+def _str(value) -> str:
+    return value if isinstance(value, str) else ""
+
+
+def card_html(display_name: str, handle: str, text: str, url: str, location: str) -> str:
+    safe_text = _str(text)
+    for old, new in _ESCAPES:
+        safe_text = safe_text.replace(old, new)
+    return CARD_TEMPLATE.format(
+        url=_str(url),
+        display_name=_str(display_name),
+        handle=_str(handle),
+        safe_text=safe_text,
+        location=_str(location) or NO_LOCATION,
+    )
+
+
+def _column(df: pd.DataFrame, name: str) -> pd.Series:
+    return df[name].fillna("")
+
+
+def _cards(df: pd.DataFrame) -> pd.Series:
+    fields: t.Dict[str, pd.Series] = {
+        "url": _column(df, "url"),
+        "display_name": _column(df, "display_name"),
+        "handle": _column(df, "handle"),
+        "location": _column(df, "location").replace("", NO_LOCATION),
+    }
+    text = _column(df, "text")
+    for old, new in _ESCAPES:
+        text = text.str.replace(old, new, regex=False)
+    fields["safe_text"] = text
+
+    html = pd.Series("", index=df.index)
+    for literal, field, _, _ in string.Formatter().parse(CARD_TEMPLATE):
+        html = html + literal
+        if field:
+            html = html + fields[field]
+    return html
+
+
+def cards_html(df: pd.DataFrame, cache: t.Optional["CardCache"] = None) -> str:
+    """All cards of ``df`` in one string, built column-wise instead of row by row."""
+    if df.empty:
+        return ""
+    if cache is None:
+        return "".join(_cards(df).tolist())
+    return "".join(cache.render(df))
+
+
+class CardCache:
+    """Bounded LRU of rendered card HTML keyed by (template version, tweet ID or URL).
+
+    Tweets are treated as immutable: a cached card is not re-rendered if its row changes.
+    """
+
+    def __init__(self, max_entries: int = 5000):
+        self.max_entries = max_entries
+        self._cards: "OrderedDict[t.Tuple[str, t.Any], str]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def __len__(self) -> int:
+        return len(self._cards)
+
+    @property
+    def hit_ratio(self) -> float:
+        total = self.hits + self.misses
+        return self.hits / total if total else 0.0
+
+    @staticmethod
+    def _keys(df: pd.DataFrame) -> t.List[t.Tuple[str, t.Any]]:
+        ids = df["id"] if "id" in df else df["url"]
+        return [(TEMPLATE_VERSION, k) for k in ids.tolist()]
+
+    def render(self, df: pd.DataFrame) -> t.List[str]:
+        """Card HTML for every row of ``df``, rendering only rows missing from the cache."""
+        keys = self._keys(df)
+        with self._lock:
+            out = [self._cards.get(k) for k in keys]
+            for k, html in zip(keys, out):
+                if html is not None:
+                    self._cards.move_to_end(k)
+        missing = [i for i, html in enumerate(out) if html is None]
+        if missing:
+            for i, html in zip(missing, _cards(df.iloc[missing]).tolist()):
+                out[i] = html
+        with self._lock:
+            self.hits += len(keys) - len(missing)
+            self.misses += len(missing)
+            for i in missing:
+                self._cards[keys[i]] = out[i]
+            while len(self._cards) > self.max_entries:
+                self._cards.popitem(last=False)
+        return out
+
+    def clear(self):
+        with self._lock:
+            self._cards.clear()
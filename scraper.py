@@ -0,0 +1,329 @@
+"""Scraping helpers that don't touch Streamlit, so they can also run in worker threads.
+
+``app.scrape_tweets`` owns the user-facing fallbacks (sample data, warnings); the
+functions here just fetch rows and raise on failure. ``source`` is any
+``sources.TweetSource`` (live snscrape, a replayed file or synthetic tweets).
+"""
+import datetime as dt
+import re
+import threading
+import typing as t
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from dataclasses import dataclass
+
+import pandas as pd
+
+from archive import ParquetArchive
+from cache import ResultCache
+from query import split_or_terms
+from store import TweetStore
+
+# Twitter snowflake IDs embed their creation time (ms since this epoch in the upper bits)
+TWITTER_EPOCH_MS = 1288834974657
+STATUS_ID_RE = re.compile(r"/status/(\d+)")
+DATE_OPERATOR_RE = re.compile(r"\b(since|until):")
+
+FETCH_MODES = ["serial", "date shards", "or split"]
+
+
+@dataclass
+class FetchOptions:
+    mode: str = "serial"
+    workers: int = 4
+    shard_days: int = 7
+
+
+def snowflake_time(tweet_id: int) -> pd.Timestamp:
+    return pd.Timestamp((tweet_id >> 22) + TWITTER_EPOCH_MS, unit="ms", tz="UTC")
+
+
+def tweet_to_row(tweet) -> dict:
+    # Derive fields with fallbacks
+    handle = getattr(tweet.user, "username", None) or ""
+    display_name = getattr(tweet.user, "displayname", None) or handle
+    location = getattr(tweet.user, "location", None) or ""
+    text = getattr(tweet, "content", None) or getattr(tweet, "rawContent", "")
+    url = getattr(tweet, "url", None) or f"https://twitter.com/{handle}"
+    tweet_id = getattr(tweet, "id", None)
+    if tweet_id is None:
+        m = STATUS_ID_RE.search(url)
+        tweet_id = int(m.group(1)) if m else 0
+    date = getattr(tweet, "date", None)
+    return {
+        "display_name": display_name,
+        "handle": f"@{handle}" if handle else "",
+        "text": text,
+        "url": url,
+        "location": location or "",
+        "id": int(tweet_id),
+        "date": pd.Timestamp(date) if date is not None else snowflake_time(int(tweet_id)),
+    }
+
+
+def merge_new_tweets(new: pd.DataFrame, old: pd.DataFrame, limit: int) -> pd.DataFrame:
+    """Put freshly fetched tweets on top of a previous result, newest first, deduplicated by ID."""
+    if new.empty:
+        return old.head(limit).reset_index(drop=True)
+    df = pd.concat([new, old], ignore_index=True)
+    df = df.drop_duplicates("id", keep="first").sort_values("id", ascending=False, kind="stable")
+    return df.head(limit).reset_index(drop=True)
+
+
+def iter_rows(
+    source,
+    query: str,
+    limit: int,
+    since_id: t.Optional[int] = None,
+    should_stop: t.Optional[t.Callable[[], bool]] = None,
+) -> t.Iterator[dict]:
+    for i, row in enumerate(source.search(query)):
+        if i >= limit or (should_stop is not None and should_stop()):
+            break
+        # Search results come newest first, so the first known ID means everything after it is cached.
+        if since_id is not None and row["id"] <= since_id:
+            break
+        yield row
+
+
+def fetch_rows(
+    source,
+    query: str,
+    limit: int,
+    since_id: t.Optional[int] = None,
+    should_stop: t.Optional[t.Callable[[], bool]] = None,
+) -> t.List[dict]:
+    return list(iter_rows(source, query, limit, since_id, should_stop))
+
+
+def iter_batches(source, query: str, limit: int, batch_size: int = 20) -> t.Iterator[t.List[dict]]:
+    """Rows in batches of ``batch_size`` as the scraper yields them, for progressive rendering."""
+    batch: t.List[dict] = []
+    for row in iter_rows(source, query, limit):
+        batch.append(row)
+        if len(batch) >= batch_size:
+            yield batch
+            batch = []
+    if batch:
+        yield batch
+
+
+def date_windows(days: int, today: t.Optional[dt.date] = None) -> t.List[t.Tuple[dt.date, dt.date]]:
+    """``(since, until)`` day windows covering the last ``days`` days, newest first (``until`` is exclusive)."""
+    today = today or dt.datetime.now(dt.timezone.utc).date()
+    return [(today - dt.timedelta(days=d), today - dt.timedelta(days=d - 1)) for d in range(days)]
+
+
+def fetch_sharded(
+    source,
+    query: str,
+    limit: int,
+    days: int = 7,
+    workers: int = 4,
+    since_id: t.Optional[int] = None,
+) -> pd.DataFrame:
+    """Fetch one ``since:``/``until:`` window per day concurrently and keep the newest ``limit`` tweets.
+
+    Each shard may return up to ``limit`` rows because the newest day alone could fill
+    the result. As soon as the finished newest shards cover ``limit``, older shards stop
+    (or never start). Only the last ``days`` days are searched.
+    """
+    windows = date_windows(days)
+    results: t.List[t.Optional[t.List[dict]]] = [None] * len(windows)
+    cutoff = [len(windows)]  # shards at or past this index are no longer needed
+    lock = threading.Lock()
+
+    with ThreadPoolExecutor(max_workers=max(1, workers)) as pool:
+        futures = {
+            pool.submit(
+                fetch_rows, source, f"{query} since:{since} until:{until}", limit, since_id,
+                lambda i=i: i >= cutoff[0],
+            ): i
+            for i, (since, until) in enumerate(windows)
+        }
+        try:
+            for fut in as_completed(futures):
+                if fut.cancelled():  # past the cutoff, cancelled before it started
+                    continue
+                i = futures[fut]
+                results[i] = fut.result()
+                with lock:
+                    total = 0
+                    for j, rows in enumerate(results):
+                        if rows is None:
+                            break
+                        total += len(rows)
+                        if total >= limit:
+                            cutoff[0] = min(cutoff[0], j + 1)
+                            break
+                if cutoff[0] < len(windows):
+                    for f, j in futures.items():
+                        if j >= cutoff[0]:
+                            f.cancel()
+        except Exception:
+            cutoff[0] = 0
+            for f in futures:
+                f.cancel()
+            raise
+
+    rows = [row for shard in results[:cutoff[0]] if shard for row in shard]
+    return _merge_frames([pd.DataFrame(rows)], limit)
+
+
+def _merge_frames(frames: t.List[pd.DataFrame], limit: int) -> pd.DataFrame:
+    """Concatenate partial results, deduplicate by ID/URL and keep the newest ``limit``."""
+    frames = [f for f in frames if not f.empty]
+    if not frames:
+        return pd.DataFrame()
+    df = pd.concat(frames, ignore_index=True)
+    df = df.drop_duplicates("id").drop_duplicates("url")
+    df = df.sort_values(["date", "id"], ascending=False, kind="stable")
+    return df.head(limit).reset_index(drop=True)
+
+
+def fetch_or_split(
+    source,
+    query: str,
+    limit: int,
+    workers: int = 4,
+    cache: t.Optional[ResultCache] = None,
+    check_every: int = 20,
+) -> pd.DataFrame:
+    """Fetch each top-level ``OR`` term of ``query`` as its own search, concurrently.
+
+    The result is the newest ``limit`` tweets of all terms together, as a serial
+    search would return. Each term is fetched newest first until it reaches ``limit``,
+    runs dry, or can no longer contribute: at least ``limit`` distinct tweets from all
+    terms are newer than its oldest one (checked every ``check_every`` rows).
+
+    Term results go through ``cache`` (when given) under their own sub-query, with the
+    number of rows actually fetched, so adding or removing a term only fetches the terms
+    whose cached rows no longer reach back far enough. These lookups are not counted as
+    cache hits or misses. Cache access stays on the calling thread.
+    """
+    terms = split_or_terms(query)
+    if len(terms) < 2:
+        return pd.DataFrame(fetch_rows(source, query, limit))
+
+    frames: t.Dict[str, pd.DataFrame] = {}
+    complete: t.Set[str] = set()
+    if cache is not None:
+        for term in terms:
+            entry = cache.peek(term)
+            if entry is not None:
+                frames[term] = entry.df.head(limit)
+                if entry.complete:
+                    complete.add(term)
+
+    def covered(ids: t.Iterable[int], oldest: int) -> bool:
+        # Enough newer tweets overall that nothing older than ``oldest`` can make the cut.
+        return sum(1 for i in ids if i >= oldest) >= limit
+
+    cached_ids = {int(i) for df in frames.values() if "id" in df for i in df["id"]}
+    todo = [
+        term for term in terms
+        if term not in frames
+        or (term not in complete and not frames[term].empty and not covered(cached_ids, int(frames[term]["id"].min())))
+    ]
+    for term in todo:
+        frames.pop(term, None)
+    seen = {int(i) for df in frames.values() if "id" in df for i in df["id"]}
+    lock = threading.Lock()
+    stopped: t.Set[str] = set()
+
+    def fetch_term(term: str) -> t.List[dict]:
+        rows: t.List[dict] = []
+
+        def should_stop() -> bool:
+            if not rows or len(rows) % check_every:
+                return False
+            with lock:
+                done = covered(seen, rows[-1]["id"])
+            if done:
+                stopped.add(term)
+            return done
+
+        for row in iter_rows(source, term, limit, should_stop=should_stop):
+            rows.append(row)
+            with lock:
+                seen.add(row["id"])
+        return rows
+
+    if todo:
+        with ThreadPoolExecutor(max_workers=max(1, workers)) as pool:
+            futures = {pool.submit(fetch_term, term): term for term in todo}
+            for fut in as_completed(futures):
+                frames[futures[fut]] = pd.DataFrame(fut.result())
+    if cache is not None:
+        for term in todo:
+            df = frames[term]
+            if not df.empty:
+                # A term stopped early holds only its newest len(df) tweets.
+                cache.put(term, len(df) if term in stopped else limit, df)
+    return _merge_frames([frames[term] for term in terms], limit)
+
+
+def fetch(
+    source,
+    query: str,
+    limit: int,
+    options: t.Optional[FetchOptions] = None,
+    since_id: t.Optional[int] = None,
+    cache: t.Optional[ResultCache] = None,
+) -> pd.DataFrame:
+    """Fetch up to ``limit`` tweets for ``query`` using the strategy in ``options``.
+
+    ``cache`` is only used by the OR-split mode, which caches full per-term results
+    and therefore ignores ``since_id``.
+    """
+    options = options or FetchOptions()
+    if options.mode == "or split":
+        return fetch_or_split(source, query, limit, options.workers, cache)
+    # Queries that already pin a date range are left alone.
+    if options.mode == "date shards" and not DATE_OPERATOR_RE.search(query):
+        return fetch_sharded(source, query, limit, options.shard_days, options.workers, since_id)
+    return pd.DataFrame(fetch_rows(source, query, limit, since_id))
+
+
+def load_tweets(
+    source,
+    query: str,
+    limit: int,
+    cache: t.Optional[ResultCache] = None,
+    incremental: bool = False,
+    store: t.Optional[TweetStore] = None,
+    options: t.Optional[FetchOptions] = None,
+    archive: t.Optional[ParquetArchive] = None,
+) -> pd.DataFrame:
+    """Fetch ``query`` and record the result in ``store``, ``archive`` and ``cache``.
+
+    In incremental mode an older result covering ``limit`` (cached, or else stored)
+    is topped up with only the tweets newer than its highest ID. Returns an empty
+    frame when nothing was found; scraping errors propagate. Only the newly fetched
+    rows are appended to ``archive``.
+    """
+    base_df, base_limit = None, limit
+    if incremental and cache is not None:
+        entry = cache.latest(query)
+        if entry is not None and entry.max_id is not None and (entry.limit >= limit or entry.complete):
+            base_df, base_limit = entry.df, max(entry.limit, limit)
+    if incremental and base_df is None and store is not None:
+        # Cold session: serve what is already on disk and only fetch the delta.
+        stored = store.load(query, limit)
+        if len(stored) >= limit:
+            base_df = stored
+    since_id = int(base_df["id"].max()) if base_df is not None else None
+
+    df = fetch(source, query, limit, options, since_id, cache)
+    if store is not None and not df.empty:
+        store.upsert(df, query)
+    if archive is not None and not df.empty:
+        archive.append(df, query)
+    if base_df is not None:
+        df = merge_new_tweets(df, base_df, base_limit)
+        if cache is not None:
+            cache.put(query, base_limit, df)
+        return df.head(limit)
+    # Only live results are cached; empty results should be retried on the next rerun.
+    if cache is not None and not df.empty:
+        cache.put(query, limit, df)
+    return df
@@ -0,0 +1,331 @@
+"""Where tweets come from.
+
+Every fetch path in ``scraper`` (and ``engine``) takes a ``TweetSource``. Its
+``search(query)`` yields row dicts in the ``store.COLUMNS`` layout, newest first,
+lazily, so callers can stop as soon as they have enough:
+
+- ``SnscrapeSource``: live search through snscrape.
+- ``ReplaySource``: tweets from a JSONL or Parquet file, filtered by the query.
+- ``SyntheticSource``: generated tweets with adjustable volume and latency, for
+  running the whole pipeline offline at realistic scale.
+"""
+import argparse
+import functools
+import itertools
+import os
+import time
+import typing as t
+import zlib
+
+import numpy as np
+import pandas as pd
+
+from cache import normalize_query
+from matching import query_mask
+from scraper import STATUS_ID_RE, TWITTER_EPOCH_MS, tweet_to_row
+from store import COLUMNS
+
+SOURCE_KINDS = ["snscrape", "replay", "synthetic"]
+
+
+class TweetSource:
+    """Base class; subclasses implement ``search``."""
+
+    # Results are worth keeping in the local store (and refreshing in the background).
+    persistent = False
+
+    @property
+    def key(self) -> str:
+        """Identifies the source and its settings, so caches don't mix results of different sources."""
+        return type(self).__name__
+
+    def search(self, query: str) -> t.Iterator[dict]:
+        raise NotImplementedError
+
+
+class SnscrapeSource(TweetSource):
+    persistent = True
+
+    def __init__(self, sntwitter):
+        self.sntwitter = sntwitter
+
+    @property
+    def key(self) -> str:
+        return "snscrape"
+
+    def search(self, query: str) -> t.Iterator[dict]:
+        for tweet in self.sntwitter.TwitterSearchScraper(query).get_items():
+            yield tweet_to_row(tweet)
+
+
+def read_tweet_file(path: str) -> pd.DataFrame:
+    """Load a ``.jsonl``/``.json`` or ``.parquet`` export into the ``store.COLUMNS`` layout."""
+    if path.endswith(".parquet"):
+        df = pd.read_parquet(path)
+    else:
+        df = pd.read_json(path, lines=True, dtype={"id": "int64"})
+    df = df.reindex(columns=COLUMNS)
+    for col in ("display_name", "handle", "text", "url", "location"):
+        df[col] = df[col].fillna("").astype(str)
+    if df["id"].isna().any():
+        from_url = pd.to_numeric(df["url"].str.extract(STATUS_ID_RE, expand=False), errors="coerce")
+        df["id"] = df["id"].fillna(from_url)
+    df["id"] = df["id"].fillna(0).astype("int64")
+    df["date"] = pd.to_datetime(df["date"], utc=True, format="ISO8601", errors="coerce")
+    if df["date"].isna().any():
+        from_id = pd.to_datetime(df["id"] // (1 << 22) + TWITTER_EPOCH_MS, unit="ms", utc=True)
+        df["date"] = df["date"].fillna(from_id)
+    return df.sort_values("id", ascending=False, kind="stable").reset_index(drop=True)
+
+
+_RECORD_CHUNK = 4096
+
+
+def _paged(rows: t.List[dict], page_size: int, latency: float) -> t.Iterator[dict]:
+    """Yield ``rows``, sleeping ``latency`` seconds before each page as a remote API would."""
+    for start in range(0, len(rows), page_size):
+        if latency:
+            time.sleep(latency)
+        yield from rows[start:start + page_size]
+
+
+class ReplaySource(TweetSource):
+    """Serves a saved export as if it were live search results.
+
+    ``latency`` seconds are slept before each page of ``page_size`` tweets. Pass
+    ``frame`` (the result of ``read_tweet_file``) to reuse an already loaded file.
+    """
+
+    def __init__(self, path: str, latency: float = 0.0, page_size: int = 20, frame: t.Optional[pd.DataFrame] = None):
+        self.path = path
+        self.latency = latency
+        self.page_size = page_size
+        self.df = frame if frame is not None else read_tweet_file(path)
+
+    @property
+    def key(self) -> str:
+        return f"replay:{os.path.abspath(self.path)}"
+
+    def search(self, query: str) -> t.Iterator[dict]:
+        matches = self.df[query_mask(self.df, query)]
+        # Rows are converted a chunk at a time; to_dict per page costs more than the rows.
+        for chunk_start in range(0, len(matches), _RECORD_CHUNK):
+            yield from _paged(matches.iloc[chunk_start:chunk_start + _RECORD_CHUNK].to_dict("records"), self.page_size, self.latency)
+
+
+# Vocabulary for synthetic tweets. Locations are drawn per user with the given
+# weights; about one profile in six has none, as on the real site.
+_FIRST_NAMES = [
+    "Aditi", "Ravi", "Sarah", "Ankit", "Maya", "Priya", "Arjun", "Emma", "Liam", "Noah", "Olivia", "Sofia",
+    "Rahul", "Neha", "Vikram", "Chen", "Yuki", "Lucas", "Mia", "Omar", "Fatima", "Diego", "Ana", "Kofi",
+    "Zara", "Ethan", "Isha", "Karan", "Leah", "Marco",
+]
+_LAST_NAMES = [
+    "Sharma", "Patel", "Lee", "Gupta", "Chen", "Singh", "Kumar", "Smith", "Garcia", "Meyer", "Rossi", "Tanaka",
+    "Khan", "Silva", "Nguyen", "Brown", "Iyer", "Reddy", "Mensah", "Kowalski", "Martin", "Costa", "Das", "Park",
+    "Novak", "Ali", "Jones", "Fischer", "Mehta", "Wong",
+]
+_ORG_NAMES = [
+    "TechNest", "CreativeHub", "StartUpWave", "Pixel Forge", "Studio North", "Growth Lab", "UX Careers",
+    "Design Jobs Daily", "Brandcraft", "Figma Freelance", "Remote Design Club", "Product Folks",
+]
+_OPENERS = [
+    "Hiring", "Looking for", "We need", "Urgently seeking", "Open role:", "Freelance gig:", "Anyone know a",
+    "Our team is hiring a", "Contract opening for a", "Seeking a",
+]
+_ROLES = [
+    "UI/UX designer", "product designer", "brand identity designer", "UI designer", "UX designer",
+    "UX researcher", "visual designer", "motion designer", "design lead", "logo designer",
+]
+_DETAILS = [
+    "for a fintech MVP.", "for a D2C skincare brand.", "Remote, 3-month contract.", "Figma + prototyping.",
+    "Mobile-first SaaS redesign.", "DM your portfolio!", "Paid, weekly sprints.", "Apply with case studies.",
+    "Must be comfortable with design systems.", "Part-time is fine.", "Budget is flexible for the right person.",
+    "Early-stage startup, equity available.", "Immediate start.", "Timezone overlap with IST preferred.",
+    "Hybrid, two days in office.", "Portfolio link in replies please.",
+]
+_HASHTAGS = ["#hiring", "#uiux", "#design", "#freelance", "#remotejobs", "#branding", "#figma", "#designjobs"]
+_LOCATIONS = {
+    "": 0.17, "Remote": 0.09, "Bengaluru, India": 0.08, "Mumbai": 0.06, "India": 0.06, "New York, NY": 0.05,
+    "San Francisco, CA": 0.05, "London, UK": 0.05, "Pune": 0.04, "Delhi": 0.04, "Berlin": 0.03,
+    "Toronto, Canada": 0.03, "Gurugram": 0.03, "Hyderabad": 0.03, "Singapore": 0.03, "Lagos, Nigeria": 0.02,
+    "Austin, TX": 0.02, "Paris": 0.02, "Dubai": 0.02, "Sydney": 0.02, "Ahmedabad, IN": 0.02, "🌍 everywhere": 0.02,
+    "Chennai": 0.02, "USA": 0.02, "Amsterdam": 0.02,
+}
+
+
+@functools.lru_cache(maxsize=1)
+def _text_parts() -> t.Tuple[np.ndarray, np.ndarray]:
+    """Every "opener role" head and every " detail[ detail[ detail]][ #tag]" tail.
+
+    Concatenating object arrays costs one Python string per row and pass, so texts
+    are assembled from these two pools with a single pass (~6M distinct texts).
+    """
+    heads = [f"{o} {r}" for o in _OPENERS for r in _ROLES]
+    details = [" " + d for d in _DETAILS]
+    combos = ["".join(p) for k in (1, 2, 3) for p in itertools.permutations(details, k)]
+    tags = [""] * len(_HASHTAGS) + [" " + h for h in _HASHTAGS]  # about half carry a hashtag
+    tails = [c + tag for c in combos for tag in tags]
+    return np.asarray(heads, dtype=object), np.asarray(tails, dtype=object)
+
+
+def synthetic_frame(
+    n: int,
+    seed: t.Union[int, t.Sequence[int]] = 0,
+    days: float = 30,
+    end: t.Optional[float] = None,
+    dates_ms: t.Optional[np.ndarray] = None,
+    id_salt: int = 0,
+) -> pd.DataFrame:
+    """``n`` realistic tweets in the ``store.COLUMNS`` layout, newest first, built column-wise.
+
+    Authors follow a heavy-tailed distribution (a few accounts post a lot), each with a
+    fixed profile location drawn from ``_LOCATIONS``; texts vary in length and are
+    almost all distinct. Timestamps
+    are uniform over the ``days`` before ``end`` (epoch seconds, default now) unless
+    ``dates_ms`` gives them. IDs are snowflakes of those timestamps and are unique for
+    ``n`` up to 2**22. ``id_salt`` is XORed into their low 22 bits so frames generated
+    for different purposes don't share IDs; with a salt, IDs sharing a timestamp are
+    no longer ordered. The same ``seed``, timestamps and salt give the same frame.
+    """
+    rng = np.random.default_rng(seed)
+    if dates_ms is None:
+        end_ms = int((end if end is not None else time.time()) * 1000)
+        dates_ms = np.sort(rng.integers(end_ms - int(days * 86_400_000), end_ms, size=n))[::-1]
+    dates_ms = np.asarray(dates_ms, dtype=np.int64)
+
+    # Authors: one user per ~8 tweets, a handful of them very active.
+    n_users = max(1, n // 8)
+    user = (rng.pareto(1.2, size=n) * n_users / 20).astype(np.int64) % n_users
+    users, user_idx = np.unique(user, return_inverse=True)
+    n_first, n_last = len(_FIRST_NAMES), len(_LAST_NAMES)
+    first = np.asarray(_FIRST_NAMES, dtype=object)[users % n_first]
+    last = np.asarray(_LAST_NAMES, dtype=object)[(users // n_first) % n_last]
+    is_org = (users % 7) == 0
+    org = np.asarray(_ORG_NAMES, dtype=object)[users % len(_ORG_NAMES)]
+    names = np.where(is_org, org, first + " " + last)
+    suffix = (users // (n_first * n_last)).astype(str).astype(object)
+    suffix[suffix == "0"] = ""
+    handles = pd.Series(names, dtype=object).str.lower().str.replace(" ", "_", regex=False).to_numpy(dtype=object) + suffix
+    loc_names = list(_LOCATIONS)
+    loc_weights = np.fromiter(_LOCATIONS.values(), dtype=float)
+    locations = np.asarray(loc_names, dtype=object)[
+        rng.choice(len(loc_names), size=len(users), p=loc_weights / loc_weights.sum())
+    ]
+
+    # Texts: opener + role + one to three details, about half with a hashtag.
+    heads, tails = _text_parts()
+    text = heads[rng.integers(len(heads), size=n)] + tails[rng.integers(len(tails), size=n)]
+
+    # Low bits count down so IDs stay strictly decreasing when timestamps tie.
+    low = (np.arange(n - 1, -1, -1, dtype=np.int64) ^ id_salt) & 0x3FFFFF
+    ids = ((dates_ms - TWITTER_EPOCH_MS) << 22) | low
+    handle = handles[user_idx]
+    url_prefix = ("https://twitter.com/" + handles + "/status/")[user_idx]
+    return pd.DataFrame({
+        "display_name": names[user_idx],
+        "handle": "@" + handle,
+        "text": text,
+        "url": url_prefix + ids.astype(str).astype(object),
+        "location": locations[user_idx],
+        "id": ids,
+        "date": pd.to_datetime(dates_ms, unit="ms", utc=True),
+    })
+
+
+class SyntheticSource(TweetSource):
+    """Generated tweets for load testing: ``volume`` tweets per query, evenly spread
+    over the last ``days`` days and newest first.
+
+    ``since:``/``until:`` in the query are honoured (so date shards work); other terms
+    are ignored so every query yields the full volume. Rows come from
+    ``synthetic_frame`` in blocks of ``block_size`` timeline slots; a block depends only
+    on the seed, the query (without ``since:``/``until:``) and its slots, so the same
+    tweet always looks the same, in every fetch mode, and the timeline advances with
+    the clock (incremental refreshes see new tweets). The seed and query are also
+    mixed into the tweet IDs, so one ID never stands for two different tweets in
+    caches keyed by ID.
+    ``latency`` seconds are slept before each page of ``page_size``.
+    """
+
+    def __init__(
+        self,
+        volume: int = 1000,
+        latency: float = 0.0,
+        page_size: int = 20,
+        seed: int = 0,
+        days: int = 30,
+        block_size: int = 4096,
+    ):
+        self.volume = volume
+        self.latency = latency
+        self.page_size = page_size
+        self.seed = seed
+        self.days = days
+        self.block_size = block_size
+
+    @property
+    def key(self) -> str:
+        return f"synthetic:{self.seed}:{self.volume}:{self.days}"
+
+    def _bounds(self, query: str) -> t.Tuple[t.Optional[pd.Timestamp], t.Optional[pd.Timestamp], str]:
+        """``since:`` and ``until:`` of ``query``, and the normalized query without them."""
+        since = until = None
+        rest = []
+        for raw in normalize_query(query).split():
+            key, _, value = raw.partition(":")
+            try:
+                if key == "since":
+                    since = pd.Timestamp(value, tz="UTC")
+                    continue
+                if key == "until":
+                    until = pd.Timestamp(value, tz="UTC")
+                    continue
+            except ValueError:
+                pass
+            rest.append(raw)
+        return since, until, " ".join(rest)
+
+    def search(self, query: str) -> t.Iterator[dict]:
+        # Tweet i (newest first) sits in timeline slot ``newest - i`` at ``slot * step_ms``.
+        step_ms = max(1, self.days * 86_400_000 // max(1, self.volume))
+        newest = int(time.time() * 1000) // step_ms
+        oldest = newest - self.volume + 1
+        since, until, terms = self._bounds(query)
+        if until is not None:
+            newest = min(newest, (until.value // 1_000_000 - 1) // step_ms)
+        if since is not None:
+            oldest = max(oldest, -(-(since.value // 1_000_000) // step_ms))
+        query_seed = zlib.crc32(terms.encode("utf-8"))
+        id_salt = zlib.crc32(f"{self.seed}:{terms}".encode("utf-8")) & 0x3FFFFF
+        slot = newest
+        while slot >= oldest:
+            block = slot // self.block_size
+            block_first = block * self.block_size
+            slots = np.arange(block_first + self.block_size - 1, block_first - 1, -1, dtype=np.int64)
+            frame = synthetic_frame(self.block_size, seed=[self.seed, query_seed, block], dates_ms=slots * step_ms, id_salt=id_salt)
+            lo = max(oldest, block_first)
+            rows = frame.iloc[block_first + self.block_size - 1 - slot: block_first + self.block_size - lo]
+            yield from _paged(rows.to_dict("records"), self.page_size, self.latency)
+            slot = lo - 1
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Write synthetic tweets to a JSONL or Parquet file (for ReplaySource and benchmarks).")
+    parser.add_argument("out", help="output path ending in .jsonl or .parquet")
+    parser.add_argument("--rows", type=int, default=100_000)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--days", type=float, default=30)
+    args = parser.parse_args()
+
+    started = time.perf_counter()
+    df = synthetic_frame(args.rows, seed=args.seed, days=args.days)
+    if args.out.endswith(".parquet"):
+        df.to_parquet(args.out, index=False)
+    else:
+        df.to_json(args.out, orient="records", lines=True, date_format="iso")
+    print(f"Wrote {len(df):,} tweets to {args.out} in {time.perf_counter() - started:.1f}s")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,255 @@
+"""Local SQLite store for collected tweets.
+
+One row per tweet (keyed on the tweet ID) plus a query -> tweet mapping so the
+dashboard can serve a query's latest results from disk and only ask the scraper
+for tweets newer than ``max_id``. Reads go through ``LIMIT`` or ``iter_chunks``
+so large archives never have to fit in memory. When SQLite is built with FTS5,
+tweet text is also indexed for ``search``.
+"""
+import sqlite3
+import threading
+import time
+import typing as t
+
+import pandas as pd
+
+from cache import normalize_query
+from query import keywords_to_fts
+
+COLUMNS = ["display_name", "handle", "text", "url", "location", "id", "date"]
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS tweets (
+    id INTEGER PRIMARY KEY,
+    date TEXT,
+    display_name TEXT,
+    handle TEXT,
+    text TEXT,
+    url TEXT,
+    location TEXT,
+    location_norm TEXT
+);
+CREATE INDEX IF NOT EXISTS idx_tweets_handle ON tweets(handle);
+CREATE INDEX IF NOT EXISTS idx_tweets_location_norm ON tweets(location_norm);
+CREATE TABLE IF NOT EXISTS query_tweets (
+    query TEXT NOT NULL,
+    tweet_id INTEGER NOT NULL,
+    PRIMARY KEY (query, tweet_id)
+) WITHOUT ROWID;
+CREATE TABLE IF NOT EXISTS queries (
+    query TEXT PRIMARY KEY,
+    max_id INTEGER,
+    fetched_at REAL
+);
+CREATE TABLE IF NOT EXISTS saved_queries (
+    query TEXT PRIMARY KEY,
+    max_tweets INTEGER NOT NULL
+);
+"""
+
+# External-content FTS5 index over tweets.text, kept in sync by triggers.
+FTS_SCHEMA = """
+CREATE VIRTUAL TABLE IF NOT EXISTS tweets_fts USING fts5(text, content='tweets', content_rowid='id');
+CREATE TRIGGER IF NOT EXISTS tweets_fts_ai AFTER INSERT ON tweets BEGIN
+    INSERT INTO tweets_fts (rowid, text) VALUES (new.id, new.text);
+END;
+CREATE TRIGGER IF NOT EXISTS tweets_fts_ad AFTER DELETE ON tweets BEGIN
+    INSERT INTO tweets_fts (tweets_fts, rowid, text) VALUES ('delete', old.id, old.text);
+END;
+CREATE TRIGGER IF NOT EXISTS tweets_fts_au AFTER UPDATE OF text ON tweets BEGIN
+    INSERT INTO tweets_fts (tweets_fts, rowid, text) VALUES ('delete', old.id, old.text);
+    INSERT INTO tweets_fts (rowid, text) VALUES (new.id, new.text);
+END;
+"""
+
+UPSERT_SQL = """
+INSERT INTO tweets (id, date, display_name, handle, text, url, location, location_norm)
+VALUES (?, ?, ?, ?, ?, ?, ?, ?)
+ON CONFLICT(id) DO UPDATE SET
+    display_name = excluded.display_name,
+    handle = excluded.handle,
+    text = excluded.text,
+    url = excluded.url,
+    location = excluded.location,
+    location_norm = excluded.location_norm
+"""
+
+
+def normalize_location(location: str) -> str:
+    return " ".join((location or "").lower().split())
+
+
+def _to_frame(df: pd.DataFrame) -> pd.DataFrame:
+    df = df.reindex(columns=COLUMNS)
+    df["id"] = df["id"].astype("int64")  # an empty result comes back untyped
+    df["date"] = pd.to_datetime(df["date"], utc=True, format="ISO8601")
+    return df
+
+
+class TweetStore:
+    """Thread-safe wrapper around one SQLite connection."""
+
+    def __init__(self, path: str = "tweets.db", batch_size: int = 10_000):
+        self.path = path
+        self.batch_size = batch_size
+        self._lock = threading.RLock()
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.executescript(SCHEMA)
+        self.has_fts = self._init_fts()
+
+    def _init_fts(self) -> bool:
+        existed = self._conn.execute(
+            "SELECT 1 FROM sqlite_master WHERE name = 'tweets_fts'"
+        ).fetchone() is not None
+        try:
+            self._conn.executescript(FTS_SCHEMA)
+        except sqlite3.OperationalError:  # SQLite built without FTS5
+            return False
+        if not existed:
+            # Index rows stored before the FTS table was added.
+            with self._conn:
+                self._conn.execute("INSERT INTO tweets_fts (tweets_fts) VALUES ('rebuild')")
+        return True
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
+
+    # ---------- Writes ----------
+    def upsert(self, df: pd.DataFrame, query: t.Optional[str] = None) -> int:
+        """Insert or refresh rows (batched), linking them to ``query`` when given."""
+        if df.empty:
+            return 0
+        q = normalize_query(query) if query is not None else None
+        with self._lock, self._conn:
+            for start in range(0, len(df), self.batch_size):
+                chunk = df.iloc[start:start + self.batch_size]
+                dates = pd.to_datetime(chunk["date"], utc=True).dt.strftime("%Y-%m-%dT%H:%M:%S.%f+00:00")
+                self._conn.executemany(UPSERT_SQL, zip(
+                    chunk["id"].astype("int64").tolist(),
+                    dates.tolist(),
+                    chunk["display_name"].tolist(),
+                    chunk["handle"].tolist(),
+                    chunk["text"].tolist(),
+                    chunk["url"].tolist(),
+                    chunk["location"].tolist(),
+                    chunk["location"].map(normalize_location).tolist(),
+                ))
+                if q is not None:
+                    self._conn.executemany(
+                        "INSERT OR IGNORE INTO query_tweets (query, tweet_id) VALUES (?, ?)",
+                        ((q, i) for i in chunk["id"].astype("int64").tolist()),
+                    )
+            if q is not None:
+                self._conn.execute(
+                    """INSERT INTO queries (query, max_id, fetched_at) VALUES (?, ?, ?)
+                       ON CONFLICT(query) DO UPDATE SET
+                           max_id = MAX(COALESCE(queries.max_id, 0), excluded.max_id),
+                           fetched_at = excluded.fetched_at""",
+                    (q, int(df["id"].max()), time.time()),
+                )
+        return len(df)
+
+    def mark_fetched(self, query: str):
+        """Record a refresh of ``query`` that may not have returned any new rows."""
+        with self._lock, self._conn:
+            self._conn.execute(
+                """INSERT INTO queries (query, max_id, fetched_at) VALUES (?, NULL, ?)
+                   ON CONFLICT(query) DO UPDATE SET fetched_at = excluded.fetched_at""",
+                (normalize_query(query), time.time()),
+            )
+
+    def save_query(self, query: str, max_tweets: int):
+        """Register ``query`` for background refreshes (see ``poller.StorePoller``)."""
+        with self._lock, self._conn:
+            self._conn.execute(
+                """INSERT INTO saved_queries (query, max_tweets) VALUES (?, ?)
+                   ON CONFLICT(query) DO UPDATE SET max_tweets = excluded.max_tweets""",
+                (normalize_query(query), int(max_tweets)),
+            )
+
+    def unsave_query(self, query: str):
+        with self._lock, self._conn:
+            self._conn.execute("DELETE FROM saved_queries WHERE query = ?", (normalize_query(query),))
+
+    # ---------- Reads ----------
+    def saved_queries(self) -> t.Dict[str, int]:
+        """Saved query -> max tweets fetched per refresh."""
+        with self._lock:
+            return dict(self._conn.execute("SELECT query, max_tweets FROM saved_queries ORDER BY query"))
+
+    def fetched_at(self, query: str) -> t.Optional[float]:
+        """Unix time of the last write for ``query``."""
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT fetched_at FROM queries WHERE query = ?", (normalize_query(query),)
+            ).fetchone()
+        return row[0] if row else None
+
+    def load(self, query: str, limit: int) -> pd.DataFrame:
+        """Newest ``limit`` stored tweets for ``query``."""
+        sql = f"""SELECT {", ".join("t." + c for c in COLUMNS)}
+                  FROM query_tweets q JOIN tweets t ON t.id = q.tweet_id
+                  WHERE q.query = ? ORDER BY q.tweet_id DESC LIMIT ?"""
+        with self._lock:
+            df = pd.read_sql_query(sql, self._conn, params=(normalize_query(query), int(limit)))
+        return _to_frame(df)
+
+    def search(self, keywords: str, limit: int) -> pd.DataFrame:
+        """Newest ``limit`` stored tweets whose text matches ``keywords`` (Twitter search syntax)."""
+        if not self.has_fts:
+            raise RuntimeError("SQLite was built without FTS5; full-text search is unavailable.")
+        match = keywords_to_fts(keywords)
+        if match is None:
+            return _to_frame(pd.DataFrame(columns=COLUMNS))
+        sql = f"""SELECT {", ".join("t." + c for c in COLUMNS)}
+                  FROM tweets_fts f JOIN tweets t ON t.id = f.rowid
+                  WHERE tweets_fts MATCH ? ORDER BY f.rowid DESC LIMIT ?"""
+        with self._lock:
+            df = pd.read_sql_query(sql, self._conn, params=(match, int(limit)))
+        return _to_frame(df)
+
+    def max_id(self, query: str) -> t.Optional[int]:
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT max_id FROM queries WHERE query = ?", (normalize_query(query),)
+            ).fetchone()
+        return row[0] if row else None
+
+    def count(self, query: t.Optional[str] = None) -> int:
+        with self._lock:
+            if query is None:
+                return self._conn.execute("SELECT COUNT(*) FROM tweets").fetchone()[0]
+            return self._conn.execute(
+                "SELECT COUNT(*) FROM query_tweets WHERE query = ?", (normalize_query(query),)
+            ).fetchone()[0]
+
+    def iter_chunks(self, query: t.Optional[str] = None, chunksize: int = 50_000) -> t.Iterator[pd.DataFrame]:
+        """Stream stored tweets (all, or one query's) newest first in bounded-size frames.
+
+        Keyset pagination on the ID keeps every page an index seek, and the lock
+        is only held while a page is read. When nothing is stored, one empty frame is
+        yielded so exports still get their header and schema.
+        """
+        cols = ", ".join("t." + c for c in COLUMNS)
+        if query is None:
+            sql = f"SELECT {cols} FROM tweets t WHERE t.id < ? ORDER BY t.id DESC LIMIT ?"
+            params: tuple = ()
+        else:
+            sql = f"""SELECT {cols} FROM query_tweets q JOIN tweets t ON t.id = q.tweet_id
+                      WHERE q.query = ? AND q.tweet_id < ? ORDER BY q.tweet_id DESC LIMIT ?"""
+            params = (normalize_query(query),)
+        last_id = 2 ** 63 - 1
+        first = True
+        while True:
+            with self._lock:
+                df = pd.read_sql_query(sql, self._conn, params=params + (last_id, chunksize))
+            if df.empty:
+                if first:
+                    yield _to_frame(df)
+                return
+            first = False
+            yield _to_frame(df)
+            last_id = int(df["id"].iloc[-1])
@@ -0,0 +1,46 @@
+import pandas as pd
+import pytest
+
+from aggregate import LocationCountCache, LocationCounts, location_counts
+
+LOCATIONS = {10: "Pune", 11: "Remote", 12: "Pune", 13: "Mumbai", 14: "Bangalore", 15: "Bengaluru, India", 16: ""}
+
+
+def frame(ids):
+    ids = sorted(ids, reverse=True)
+    return pd.DataFrame({"id": ids, "location": [LOCATIONS[i] for i in ids]})
+
+
+def as_dict(top):
+    return dict(zip(top["location"], top["size"]))
+
+
+@pytest.mark.parametrize("before, after, mode", [
+    ({10, 12}, {10, 12, 14, 15}, "incremental"),  # newer tweets
+    ({14, 15}, {10, 11, 14, 15}, "incremental"),  # older tweets
+    ({10, 14}, {10, 11, 14}, "incremental"),      # inside the counted ID range
+    ({10, 12, 14}, {10, 11, 14, 15}, "full"),     # 12 dropped
+    ({10, 12, 14}, {12, 14}, "full"),             # smaller limit
+])
+def test_update_matches_a_full_count(before, after, mode):
+    counts = LocationCounts()
+    assert counts.update(frame(before)) == "full"
+    assert counts.update(frame(after)) == mode
+    assert as_dict(counts.top()) == as_dict(location_counts(frame(after)))
+    assert counts.update(frame(after)) == "cached"
+
+
+def test_counts_group_canonical_locations():
+    top = location_counts(frame(LOCATIONS))
+    assert as_dict(top) == {"Bengaluru": 2, "Pune": 2, "Mumbai": 1, "Remote": 1, "Unknown": 1}
+    assert list(top["location"][:2]) == ["Bengaluru", "Pune"]  # ties broken by name
+
+
+def test_cache_keeps_counts_per_key_and_evicts():
+    cache = LocationCountCache(max_entries=2)
+    cache.top("a", frame({10, 12}))
+    cache.top("a", frame({10, 12, 13}))
+    cache.top("b", frame({11}))
+    cache.top("c", frame({11}))
+    assert cache.stats == {"cached": 0, "incremental": 1, "full": 3}
+    assert len(cache) == 2
@@ -0,0 +1,76 @@
+import threading
+
+import pandas as pd
+import pytest
+
+pytest.importorskip("pyarrow")
+
+from archive import ParquetArchive  # noqa: E402
+from sources import synthetic_frame  # noqa: E402
+
+
+@pytest.fixture
+def archive(tmp_path):
+    return ParquetArchive(str(tmp_path / "archive"))
+
+
+def fetches(archive):
+    # All in one day partition.
+    df = synthetic_frame(300, seed=1, days=0.01, end=1.7e9)
+    archive.append(df, "query a")
+    archive.append(df.head(200), "query b")
+    archive.append(df.head(100), "query a")  # refetch: duplicates of query a rows
+    return df
+
+
+def test_append_partitions_by_day_and_filters_rows(archive):
+    df = synthetic_frame(400, seed=2, days=3, end=1.7e9)
+    archive.append(df, " query  a")
+    days = pd.to_datetime(df["date"], utc=True).dt.strftime("%Y-%m-%d")
+    parts = archive.partitions()
+    assert list(parts["day"]) == sorted(days.unique())
+    assert parts.set_index("day")["rows"].to_dict() == days.value_counts().to_dict()
+    since = days.max()
+    got = archive.read(columns=["id"], since=since, query="query a")
+    assert set(got["id"]) == set(df.loc[days == since, "id"])
+    assert archive.count(query="other") == 0
+    assert list(archive.read(columns=["id"], limit=5)["id"]) == sorted(df["id"], reverse=True)[:5]
+
+
+def test_compact_keeps_one_row_per_tweet_and_query(archive):
+    df = fetches(archive)
+    assert archive.count(query="query a") == 400
+    stats = archive.compact()
+    assert stats == {"days": 1, "files_merged": 3, "rows": 500}
+    assert archive.count(query="query a") == 300
+    assert archive.count(query="query b") == 200
+    assert (archive.partitions()["files"] == 1).all()
+    assert set(archive.read(query="query a")["id"]) == set(df["id"])
+
+
+def test_compact_keeps_latest_fetch(archive):
+    df = fetches(archive)
+    latest = archive.scanner(["fetched_at"]).to_table().to_pandas()["fetched_at"].max()
+    archive.compact()
+    rows = archive.read(columns=["id", "fetched_at"], query="query a").set_index("id")["fetched_at"]
+    refetched = df["id"].head(100)
+    assert (rows[refetched] == latest).all()
+    assert (rows.drop(refetched) < latest).all()
+
+
+def test_second_compaction_is_a_no_op(archive):
+    fetches(archive)
+    archive.compact()
+    assert archive.compact() == {"days": 0, "files_merged": 0, "rows": 0}
+
+
+def test_concurrent_compactions_merge_once(archive):
+    fetches(archive)
+    results = []
+    threads = [threading.Thread(target=lambda: results.append(archive.compact())) for _ in range(2)]
+    for th in threads:
+        th.start()
+    for th in threads:
+        th.join(30)
+    assert sorted(r["days"] for r in results) == [0, 1]
+    assert archive.count(query="query a") == 300
@@ -0,0 +1,104 @@
+import threading
+
+import pandas as pd
+import pytest
+
+from cache import ResultCache
+
+
+def frame(n):
+    return pd.DataFrame({"id": range(n, 0, -1)})
+
+
+def run_concurrently(n, target):
+    results, errors = [None] * n, [None] * n
+
+    def worker(i):
+        try:
+            results[i] = target()
+        except Exception as e:
+            errors[i] = e
+
+    threads = [threading.Thread(target=worker, args=(i,)) for i in range(n)]
+    for th in threads:
+        th.start()
+    for th in threads:
+        th.join(10)
+    return results, errors
+
+
+def test_get_or_load_coalesces_concurrent_misses():
+    cache = ResultCache()
+    calls = []
+    waiting = threading.Event()
+
+    def load():
+        calls.append(1)
+        # Hold the load until every other caller is waiting on it.
+        assert waiting.wait(5)
+        df = frame(20)
+        cache.put("q", 20, df)
+        return df
+
+    def watch():
+        while cache.coalesced < 4:
+            threading.Event().wait(0.01)
+        waiting.set()
+
+    threading.Thread(target=watch, daemon=True).start()
+    results, errors = run_concurrently(5, lambda: cache.get_or_load("q", 20, load))
+    assert errors == [None] * 5
+    assert len(calls) == 1
+    assert cache.misses == 1 and cache.coalesced == 4
+    assert all(len(r) == 20 for r in results)
+    # Later callers are served from the cache, including smaller limits.
+    assert len(cache.get_or_load("  q ", 10, load)) == 10
+    assert len(calls) == 1 and cache.hits == 1
+
+
+def test_get_or_load_propagates_errors_to_waiters():
+    cache = ResultCache()
+    waiting = threading.Event()
+
+    def load():
+        assert waiting.wait(5)
+        raise ConnectionError("down")
+
+    def watch():
+        while cache.coalesced < 2:
+            threading.Event().wait(0.01)
+        waiting.set()
+
+    threading.Thread(target=watch, daemon=True).start()
+    _, errors = run_concurrently(3, lambda: cache.get_or_load("q", 20, load))
+    assert all(isinstance(e, ConnectionError) for e in errors)
+    # Nothing was cached, so the next caller loads again.
+    assert len(cache.get_or_load("q", 20, lambda: frame(20))) == 20
+    assert cache.misses == 2
+
+
+def test_smaller_pending_load_is_not_shared():
+    cache = ResultCache()
+    release = threading.Event()
+    started = threading.Event()
+
+    def small():
+        started.set()
+        assert release.wait(5)
+        return frame(10)
+
+    th = threading.Thread(target=lambda: cache.get_or_load("q", 10, small))
+    th.start()
+    assert started.wait(5)
+    # A caller wanting more rows than the running load fetches starts its own.
+    assert len(cache.get_or_load("q", 20, lambda: frame(20))) == 20
+    release.set()
+    th.join(5)
+    assert cache.coalesced == 0
+
+
+@pytest.mark.parametrize("query", ["a  b", " a b ", "a\tb"])
+def test_queries_are_normalized(query):
+    cache = ResultCache()
+    cache.put("a b", 5, frame(5))
+    assert cache.get(query, 5) is not None
@@ -0,0 +1,109 @@
+import threading
+import time
+
+import pytest
+
+from engine import FetchEngine, FetchJob
+
+
+def rows(query, n):
+    return [{"id": i, "text": f"{query} {i}"} for i in range(n, 0, -1)]
+
+
+def slow_fetcher(stopped):
+    """Blocks until told to stop, then records the query."""
+    def fetcher(query, limit, since_id, should_stop):
+        while not should_stop():
+            time.sleep(0.01)
+        stopped.add(query)
+        return []
+    return fetcher
+
+
+def wait_for(condition, timeout=5.0):
+    deadline = time.monotonic() + timeout
+    while not condition() and time.monotonic() < deadline:
+        time.sleep(0.01)
+    return condition()
+
+
+def test_plain_function_fetcher_results_in_order():
+    engine = FetchEngine(lambda query, limit, since_id, should_stop: rows(query, limit), concurrency=2)
+    results = engine.run([FetchJob("a", 3), FetchJob("b", 1)])
+    assert [r.status for r in results] == ["ok", "ok"]
+    assert [len(r.df) for r in results] == [3, 1]
+    assert results[0].df["text"].iloc[0] == "a 3"
+
+
+def test_errors_are_reported_per_job():
+    def fetcher(query, limit, since_id, should_stop):
+        if query == "bad":
+            raise ValueError(query)
+        return rows(query, limit)
+
+    good, bad = FetchEngine(fetcher).run([FetchJob("good", 2), FetchJob("bad", 2)])
+    assert good.ok
+    assert bad.status == "error" and isinstance(bad.error, ValueError)
+
+
+def test_timeout_signals_the_fetcher_thread():
+    stopped = set()
+    engine = FetchEngine(slow_fetcher(stopped), timeout=0.1)
+    [result] = engine.run([FetchJob("slow", 10)])
+    assert result.status == "timeout"
+    assert wait_for(lambda: "slow" in stopped)
+
+
+def test_cancel_from_another_thread():
+    stopped = set()
+    engine = FetchEngine(slow_fetcher(stopped), concurrency=1, timeout=None)
+    threading.Timer(0.1, engine.cancel).start()
+    started = time.perf_counter()
+    results = engine.run([FetchJob("a", 10), FetchJob("b", 10)])
+    assert time.perf_counter() - started < 5
+    assert all(r.status == "cancelled" for r in results)
+    assert wait_for(lambda: "a" in stopped)
+
+
+def test_failing_progress_callback_cancels_and_propagates():
+    stopped = set()
+    engine = FetchEngine(slow_fetcher(stopped), timeout=None)
+
+    def on_progress(done, total):
+        raise KeyboardInterrupt
+
+    with pytest.raises(KeyboardInterrupt):
+        engine.run([FetchJob("a", 10)], on_progress=on_progress)
+    assert wait_for(lambda: "a" in stopped)
+
+
+def stubborn_fetcher(query, limit, since_id, should_stop):
+    # Never checks should_stop, like a request hanging inside the scraper.
+    time.sleep(2)
+    return rows(query, limit)
+
+
+def test_timeout_does_not_wait_for_a_stuck_fetcher():
+    engine = FetchEngine(stubborn_fetcher, timeout=0.1)
+    started = time.perf_counter()
+    [result] = engine.run([FetchJob("stuck", 10)])
+    assert result.status == "timeout"
+    assert time.perf_counter() - started < 1
+
+
+def test_cancel_does_not_wait_for_a_stuck_fetcher():
+    engine = FetchEngine(stubborn_fetcher, concurrency=1, timeout=None)
+    threading.Timer(0.1, engine.cancel).start()
+    started = time.perf_counter()
+    results = engine.run([FetchJob("a", 10), FetchJob("b", 10)])
+    assert time.perf_counter() - started < 1
+    assert [r.status for r in results] == ["cancelled", "cancelled"]
+
+
+def test_stuck_job_does_not_starve_the_next_one():
+    def fetcher(query, limit, since_id, should_stop):
+        return stubborn_fetcher(query, limit, since_id, should_stop) if query == "stuck" else rows(query, limit)
+
+    engine = FetchEngine(fetcher, concurrency=1, timeout=0.2)
+    stuck, ok = engine.run([FetchJob("stuck", 1), FetchJob("ok", 1)])
+    assert stuck.status == "timeout" and ok.ok
@@ -0,0 +1,65 @@
+import pandas as pd
+import pytest
+
+from geo import Gazetteer, RegionIndex, region_labels, region_mask
+
+
+@pytest.fixture(scope="module")
+def gaz():
+    return Gazetteer()
+
+
+@pytest.mark.parametrize("location, codes", [
+    ("Bengaluru, India", {"IN", "IN-BLR"}),
+    ("Bangalore", {"IN", "IN-BLR"}),
+    ("BLR", {"IN", "IN-BLR"}),
+    ("Ahmedabad, IN", {"IN", "IN-AMD"}),
+    ("Based in Berlin", {"DE", "DE-BER"}),
+    ("🌍 everywhere", {"REMOTE"}),
+    ("Austin, TX", {"US", "US-AUS"}),
+    ("San Francisco, CA", {"US", "US-SFO"}),
+    ("Toronto, CA", {"CA", "CA-YTO"}),
+    ("Vancouver, CA", {"CA", "CA-YVR"}),
+    # US state abbreviations that are also country codes name no place on their own.
+    ("Indianapolis, IN", set()),
+    ("Wilmington, DE", set()),
+    ("Bogotá, CO", set()),
+    ("Indiana", set()),
+    ("in the clouds", set()),
+])
+def test_resolve(gaz, location, codes):
+    assert gaz.resolve(location).codes == codes
+
+
+@pytest.mark.parametrize("location, label", [
+    ("Bangalore, India", "Bengaluru"),
+    ("india", "India"),
+    ("work from home", "Remote"),
+    ("  Indianapolis,   IN ", "Indianapolis, IN"),
+])
+def test_labels(gaz, location, label):
+    assert gaz.resolve(location).label == label
+
+
+LOCATIONS = pd.Series([
+    "Bengaluru, India", "Indianapolis, IN", "Mumbai", "Toronto, CA", "Remote", "", None,
+    "San Francisco, CA", "Bogotá, CO", "Somewhere nice",
+])
+
+
+@pytest.mark.parametrize("terms, expected", [
+    (["India"], [0, 2]),
+    (["USA"], [7]),
+    (["Canada"], [3]),
+    (["Remote", "Bengaluru"], [0, 4]),
+    (["nice"], [9]),  # unknown to the gazetteer: substring match
+])
+def test_region_mask_and_index_agree(terms, expected):
+    df = pd.DataFrame({"location": LOCATIONS, "id": range(len(LOCATIONS), 0, -1)})
+    assert list(region_mask(df["location"], terms).nonzero()[0]) == expected
+    assert list(RegionIndex(df).rows(terms)) == expected
+
+
+def test_region_labels_group_aliases():
+    codes, labels = region_labels(pd.Series(["Bangalore", "Bengaluru, India", "Indianapolis, IN"]))
+    assert list(labels[codes]) == ["Bengaluru", "Bengaluru", "Indianapolis, IN"]
@@ -0,0 +1,52 @@
+import random
+import re
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from matching import AHO_CORASICK_MIN_PATTERNS, AhoCorasick, substring_mask
+
+
+def test_findall_overlapping_patterns():
+    ac = AhoCorasick(["he", "she", "his", "hers"])
+    assert ac.findall("ushers") == {"she", "he", "hers"}
+    assert ac.findall("ahishe") == {"his", "she", "he"}
+    assert not ac.search("hxs")
+
+
+def test_case_sensitivity():
+    assert AhoCorasick(["Remote"]).search("fully REMOTE role")
+    assert not AhoCorasick(["Remote"], case_sensitive=True).search("fully remote role")
+    assert AhoCorasick(["Remote"], case_sensitive=True).findall("Remote-first") == {"Remote"}
+
+
+def test_empty_patterns_and_text():
+    ac = AhoCorasick(["", "x"])
+    assert ac.patterns == ["x"]
+    assert not ac.search("")
+    assert not ac.search(None)
+    assert not AhoCorasick([]).contains(pd.Series(["abc"])).any()
+
+
+@pytest.mark.parametrize("seed", range(20))
+def test_matches_naive_search(seed):
+    # A tiny alphabet forces shared prefixes and long failure-link chains.
+    rng = random.Random(seed)
+    word = lambda n: "".join(rng.choice("aab") for _ in range(n))  # noqa: E731
+    patterns = [word(rng.randint(1, 5)) for _ in range(rng.randint(1, 8))]
+    ac = AhoCorasick(patterns)
+    for _ in range(50):
+        text = word(rng.randint(0, 20))
+        expected = {p for p in patterns if p in text}
+        assert ac.findall(text) == expected
+        assert ac.search(text) == bool(expected)
+
+
+def test_contains_agrees_with_regex_mask():
+    terms = ["c++", "ui/ux", "(remote)", "a.b"] + [f"city{i}" for i in range(AHO_CORASICK_MIN_PATTERNS)]
+    values = pd.Series(["C++ dev", "UI/UX lead", "(Remote) role", "axb", None, "CITY7", "nothing", "a.b", np.nan] * 3)
+    mask = substring_mask(values, terms)
+    reference = values.fillna("").str.lower().str.contains("|".join(map(re.escape, terms)), regex=True)
+    pd.testing.assert_series_equal(mask, reference, check_names=False)
+    assert mask.tolist()[:9] == [True, True, True, False, False, True, False, True, False]
@@ -0,0 +1,41 @@
+import pytest
+
+from query import QUERY_SUFFIX, build_query, keywords_fts_dropped, keywords_to_fts, split_or_terms
+
+
+def test_split_keeps_suffix_on_every_term():
+    terms = split_or_terms(build_query('"ui designer" OR "ux designer"'))
+    assert terms == [f'"ui designer" {QUERY_SUFFIX}', f'"ux designer" {QUERY_SUFFIX}']
+
+
+def test_split_parenthesized_group():
+    terms = split_or_terms(build_query("(designer OR illustrator) remote"))
+    assert terms == [f"designer remote {QUERY_SUFFIX}", f"illustrator remote {QUERY_SUFFIX}"]
+
+
+def test_split_without_or_is_unchanged():
+    query = build_query('"ux designer" -intern')
+    assert split_or_terms(query) == [query]
+
+
+def test_split_drops_duplicate_terms():
+    assert split_or_terms("a OR b OR a") == ["a", "b"]
+
+
+@pytest.mark.parametrize(
+    "keywords, dropped",
+    [
+        ("figma -remote", []),
+        ("figma OR -remote", ["-remote"]),
+        ("-remote", ["-remote"]),
+        ('"ui designer" from:bob', ["from:bob"]),
+        ("a lang:en", ["lang:en"]),
+    ],
+)
+def test_fts_reports_dropped_parts(keywords, dropped):
+    assert keywords_fts_dropped(keywords) == dropped
+
+
+def test_fts_keeps_what_it_can_express():
+    assert keywords_to_fts("figma OR -remote") is not None
+    assert keywords_to_fts("-remote") is None
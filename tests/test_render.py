@@ -0,0 +1,48 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from render import NO_LOCATION, CardCache, card_html, cards_html
+from sources import synthetic_frame
+
+FIELDS = ["display_name", "handle", "text", "url", "location"]
+
+
+def row_by_row(df):
+    return "".join(card_html(*(row[f] for f in FIELDS)) for row in df.to_dict("records"))
+
+
+def awkward_frame():
+    return pd.DataFrame({
+        "id": [5, 4, 3, 2, 1],
+        "display_name": ["Ada & Co", None, "{name}", "Zoë 🎨", np.nan],
+        "handle": ["@ada", "@b", "@{handle}", "@z", None],
+        "text": ["a < b && c > d\nnext line", "", None, "50% off {safe_text} $x \\n", "&amp;"],
+        "url": ["https://x.com/1?a=1&b=2", None, "u3", "u4", "u5"],
+        "location": ["", None, "Lagos", np.nan, "Berlin <DE>"],
+    })
+
+
+@pytest.mark.parametrize("df", [awkward_frame(), synthetic_frame(500, seed=3)], ids=["awkward", "synthetic"])
+def test_cards_html_is_byte_identical_to_row_by_row(df):
+    html = cards_html(df)
+    assert html.encode("utf-8") == row_by_row(df).encode("utf-8")
+    assert cards_html(df, CardCache()) == html
+
+
+def test_cards_html_empty_frame():
+    assert cards_html(awkward_frame().head(0)) == ""
+
+
+def test_missing_location_uses_placeholder():
+    assert cards_html(awkward_frame()).count(NO_LOCATION) == 3
+
+
+def test_card_cache_renders_only_new_rows():
+    df = synthetic_frame(50, seed=4)
+    cache = CardCache()
+    first = cards_html(df.iloc[10:], cache)
+    assert cache.misses == 40 and cache.hits == 0
+    assert cards_html(df, cache) == row_by_row(df)
+    assert cache.misses == 50 and cache.hits == 40
+    assert first == row_by_row(df.iloc[10:])
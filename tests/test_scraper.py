@@ -0,0 +1,114 @@
+import pandas as pd
+import pytest
+
+from cache import ResultCache
+from scraper import fetch_or_split, iter_rows, load_tweets, merge_new_tweets
+from store import TweetStore
+
+STEP = {"a": 2, "b": 3, "c": 7}  # term -> every n-th tweet ID mentions it; some overlap
+
+
+class TermSource:
+    """Tweets 1..size, newest first; a query matches the IDs of its first word's step."""
+
+    def __init__(self, size=2000):
+        self.size = size
+        self.served = {}
+
+    def search(self, query):
+        term = query.split()[0]
+        for i in range(self.size, 0, -1):
+            if i % STEP[term] == 0:
+                self.served[term] = self.served.get(term, 0) + 1
+                yield {
+                    "display_name": "U", "handle": "u", "text": term, "location": "",
+                    "id": i, "url": f"https://twitter.com/u/status/{i}", "date": pd.Timestamp(i, unit="s", tz="UTC"),
+                }
+
+
+def expected(terms, limit, size=2000):
+    ids = sorted({i for i in range(1, size + 1) for term in terms if i % STEP[term] == 0}, reverse=True)
+    return ids[:limit]
+
+
+@pytest.mark.parametrize("query, terms", [("a OR b OR c", "abc"), ("(a OR c) lang:en", "ac")])
+@pytest.mark.parametrize("limit", [10, 300])
+def test_or_split_returns_newest_of_all_terms(query, terms, limit):
+    source = TermSource()
+    df = fetch_or_split(source, query, limit)
+    assert list(df["id"]) == expected(terms, limit)
+    if limit == 300:
+        # Terms stop once they can no longer make the cut, instead of fetching ``limit`` each.
+        assert sum(source.served.values()) < len(terms) * limit
+
+
+def test_or_split_reuses_terms_when_one_is_removed():
+    cache = ResultCache()
+    source = TermSource()
+    fetch_or_split(source, "a OR b OR c", 300, cache=cache)
+    source.served.clear()
+    df = fetch_or_split(source, "a OR b", 300, cache=cache)
+    assert list(df["id"]) == expected("ab", 300)
+    # Only terms whose cached rows don't reach back far enough are fetched again.
+    assert "a" not in source.served
+    assert cache.hits == cache.misses == 0
+
+
+def test_or_split_same_terms_again_fetches_nothing():
+    cache = ResultCache()
+    source = TermSource()
+    first = fetch_or_split(source, "a OR b OR c", 300, cache=cache)
+    source.served.clear()
+    second = fetch_or_split(source, "c OR b OR a", 300, cache=cache)
+    assert source.served == {}
+    assert set(first["id"]) == set(second["id"])
+
+
+def test_or_split_exhausted_terms_are_complete():
+    cache = ResultCache()
+    source = TermSource(size=50)
+    fetch_or_split(source, "a OR c", 300, cache=cache)
+    source.served.clear()
+    df = fetch_or_split(source, "a OR c", 300, cache=cache)
+    assert source.served == {}
+    assert list(df["id"]) == expected("ac", 300, size=50)
+
+
+def test_or_split_refetches_terms_that_fall_short():
+    cache = ResultCache()
+    source = TermSource()
+    fetch_or_split(source, "a OR b OR c", 300, cache=cache)
+    source.served.clear()
+    # Without "a", the cached rows of "b" and "c" no longer reach back far enough.
+    df = fetch_or_split(source, "b OR c", 300, cache=cache)
+    assert list(df["id"]) == expected("bc", 300)
+    assert source.served
+
+
+def test_merge_new_tweets_puts_new_on_top_without_duplicates():
+    old = pd.DataFrame({"id": [8, 6, 4, 2], "text": ["old"] * 4})
+    new = pd.DataFrame({"id": [12, 10, 8], "text": ["new"] * 3})
+    df = merge_new_tweets(new, old, 5)
+    assert list(df["id"]) == [12, 10, 8, 6, 4]
+    assert df.loc[df["id"] == 8, "text"].item() == "new"
+    assert list(merge_new_tweets(new.head(0), old, 3)["id"]) == [8, 6, 4]
+
+
+def test_iter_rows_stops_at_since_id():
+    source = TermSource(size=100)
+    assert [r["id"] for r in iter_rows(source, "a", 50, since_id=90)] == [100, 98, 96, 94, 92]
+    assert source.served["a"] == 6  # the first known tweet ends the scan
+
+
+@pytest.mark.parametrize("warm", ["cache", "store"])
+def test_incremental_rerun_fetches_only_new_tweets(tmp_path, warm):
+    source = TermSource(size=1000)
+    cache = ResultCache()
+    store = TweetStore(str(tmp_path / "tweets.db"))
+    load_tweets(source, "a", 50, cache=cache, store=store)
+    if warm == "store":
+        cache.clear()  # a new session with only the database
+    source.size, source.served = 1020, {}
+    df = load_tweets(source, "a", 50, cache=cache, incremental=True, store=store)
+    assert list(df["id"]) == expected("a", 50, size=1020)
+    assert source.served["a"] == 11
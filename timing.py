@@ -0,0 +1,121 @@
+"""Per-rerun stage timings for the dashboard.
+
+``app.py`` wraps each stage of the script in ``StageTimer.stage(name)`` and calls
+``finish()`` at the end; the resulting ``RunTiming`` goes into a per-session
+``TimingHistory`` shown in the Performance panel. With ``TJD_PERF_LOG`` set, every
+run is also logged as one JSON object per line: ``1`` logs to stderr, any other
+value is a file path to append to.
+"""
+import contextlib
+import json
+import logging
+import os
+import threading
+import time
+import typing as t
+from collections import deque
+from dataclasses import dataclass, field
+
+import pandas as pd
+
+PERF_LOG_ENV = "TJD_PERF_LOG"
+OTHER = "other"
+
+log = logging.getLogger("tjd.perf")
+_log_lock = threading.Lock()
+_log_configured = False
+
+
+@dataclass
+class RunTiming:
+    started: float
+    total: float
+    stages: t.Dict[str, float] = field(default_factory=dict)
+
+    def with_other(self) -> t.Dict[str, float]:
+        """Stage times plus the unattributed rest of the run (widgets, layout, Streamlit itself)."""
+        return {**self.stages, OTHER: max(0.0, self.total - sum(self.stages.values()))}
+
+    def to_json(self, **extra) -> str:
+        return json.dumps({
+            "event": "rerun",
+            "ts": round(self.started, 3),
+            "total_ms": round(self.total * 1000, 2),
+            "stages_ms": {k: round(v * 1000, 2) for k, v in self.stages.items()},
+            **extra,
+        })
+
+
+class StageTimer:
+    """Accumulates wall time per named stage for one script run."""
+
+    def __init__(self):
+        self.started = time.time()
+        self._t0 = time.perf_counter()
+        self.stages: t.Dict[str, float] = {}
+
+    @contextlib.contextmanager
+    def stage(self, name: str):
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.stages[name] = self.stages.get(name, 0.0) + time.perf_counter() - started
+
+    def finish(self) -> RunTiming:
+        return RunTiming(self.started, time.perf_counter() - self._t0, dict(self.stages))
+
+
+class TimingHistory:
+    """Rolling window of the last ``maxlen`` runs."""
+
+    def __init__(self, maxlen: int = 50):
+        self.runs: t.Deque[RunTiming] = deque(maxlen=maxlen)
+
+    def __len__(self) -> int:
+        return len(self.runs)
+
+    def add(self, run: RunTiming):
+        self.runs.append(run)
+
+    def frame(self) -> pd.DataFrame:
+        """Milliseconds per stage (columns) for each run (rows, oldest first)."""
+        rows = [{k: v * 1000 for k, v in run.with_other().items()} for run in self.runs]
+        return pd.DataFrame(rows).fillna(0.0)
+
+    def summary(self) -> pd.DataFrame:
+        """Last run next to the median and p90 of the window, per stage, slowest first."""
+        hist = self.frame()
+        if hist.empty:
+            return pd.DataFrame(columns=["Stage", "Last (ms)", "Median (ms)", "p90 (ms)", "Share (%)"])
+        last = hist.iloc[-1]
+        out = pd.DataFrame({
+            "Stage": hist.columns,
+            "Last (ms)": last.to_numpy(),
+            "Median (ms)": hist.median().to_numpy(),
+            "p90 (ms)": hist.quantile(0.9).to_numpy(),
+            "Share (%)": (100 * last / last.sum()).to_numpy() if last.sum() else 0.0,
+        })
+        return out.sort_values("Last (ms)", ascending=False).reset_index(drop=True)
+
+
+def _configure_log(target: str):
+    global _log_configured
+    with _log_lock:
+        if _log_configured:
+            return
+        handler = logging.StreamHandler() if target == "1" else logging.FileHandler(target, encoding="utf-8")
+        handler.setFormatter(logging.Formatter("%(message)s"))
+        log.addHandler(handler)
+        log.setLevel(logging.INFO)
+        log.propagate = False
+        _log_configured = True
+
+
+def log_run(run: RunTiming, **extra):
+    """Write ``run`` as a JSON line if ``TJD_PERF_LOG`` is set."""
+    target = os.environ.get(PERF_LOG_ENV, "")
+    if not target or target == "0":
+        return
+    _configure_log(target)
+    log.info(run.to_json(**extra))